@@ -1,5 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from . import stats
+from .summaries import carts_with_totals
 from .models import (
     CustomUser, 
     Category, 
@@ -7,10 +11,24 @@ from .models import (
     ProductVariant, 
     Cart, 
     CartItem, 
+    StockReservation,
+    IdempotencyKey,
+    Task,
     Order, 
     OrderItem
 )
 
+class EstimatedCountPaginator(Paginator):
+    # Sin filtros ni búsqueda el total sale de los contadores del panel
+    # (stats.py); con filtros se hace el COUNT(*) normal
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            total = stats.model_count(self.object_list.model)
+            if total is not None:
+                return total
+        return super().count
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -45,6 +63,7 @@ class ProductVariantInline(admin.TabularInline):
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'slug')
+    list_select_related = ('category',)
     list_filter = ('category',)
     search_fields = ('name', 'category__name')
     prepopulated_fields = {'slug': ('name',)}
@@ -53,9 +72,13 @@ class ProductAdmin(admin.ModelAdmin):
 @admin.register(ProductVariant)
 class ProductVariantAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'product', 'color', 'price', 'stock', 'model_number')
-    list_filter = ('product__category', 'product')
+    list_select_related = ('product',)
+    # Filtrar por producto listaría todos los productos; se busca por nombre
+    list_filter = ('product__category',)
     search_fields = ('product__name', 'color', 'model_number')
     autocomplete_fields = ('product',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 class CartItemInline(admin.TabularInline):
     model = CartItem
@@ -64,17 +87,51 @@ class CartItemInline(admin.TabularInline):
     readonly_fields = ('get_total_item_price',)
     autocomplete_fields = ('product_variant',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product_variant__product')
+
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'user', 'session_key', 'created_at', 'get_total_price')
+    list_select_related = ('user',)
     readonly_fields = ('created_at', 'get_total_price', 'user', 'session_key')
     search_fields = ('user__email', 'session_key')
     inlines = [CartItemInline]
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return carts_with_totals(super().get_queryset(request))
+
+    @admin.display(description='Total price', ordering='total_price')
+    def get_total_price(self, obj):
+        return obj.get_total_price()
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ('cart', 'product_variant', 'quantity')
+    list_select_related = ('cart__user', 'product_variant__product')
     autocomplete_fields = ('cart', 'product_variant')
+    show_full_result_count = False
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('cart', 'product_variant', 'quantity', 'expires_at')
+    list_select_related = ('cart__user', 'product_variant__product')
+    list_filter = ('expires_at',)
+    readonly_fields = ('cart', 'product_variant', 'quantity', 'expires_at')
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'order', 'created_at')
+    list_select_related = ('user', 'order__user')
+    search_fields = ('key', 'user__email')
+    readonly_fields = ('key', 'user', 'order', 'created_at')
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'locked_by', 'updated_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at', 'updated_at')
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -83,16 +140,24 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ('product_variant', 'quantity', 'price')
     can_delete = False 
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product_variant__product')
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'total_amount', 'is_paid', 'created_at')
+    list_select_related = ('user',)
     list_filter = ('is_paid', 'created_at')
     search_fields = ('id', 'user__email')
     readonly_fields = ('user', 'created_at', 'total_amount')
     inlines = [OrderItemInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ('order', 'product_variant', 'quantity', 'price')
+    list_select_related = ('order__user', 'product_variant__product')
     readonly_fields = ('order', 'product_variant', 'quantity', 'price')
     autocomplete_fields = ('order', 'product_variant')
+    show_full_result_count = False
@@ -0,0 +1,223 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.core.cache import cache
+
+# Los fragmentos se invalidan cambiando la versión, no borrando claves
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+PAGE_TIMEOUT = 60 * 10
+CATALOG_VERSION_KEY = 'catalog:version'
+PAGE_LOCK_TIMEOUT = 10
+# Tiempo máximo que un worker espera a que otro termine de generar la página
+PAGE_WAIT = 2.0
+PAGE_WAIT_STEP = 0.05
+# Generación de los índices en memoria (difuso, prefijos, facetas); cada
+# worker la compara antes de responder y aplica los productos cambiados
+INDEX_GENERATION_KEY = 'catalog:index:generation'
+# Generaciones recordadas; un worker más atrasado reconstruye su índice
+INDEX_CHANGES_KEPT = 200
+PAGE_HITS_KEY = 'pagecache:hits'
+PAGE_MISSES_KEY = 'pagecache:misses'
+# Segundos entre volcados de los contadores de aciertos a la cache compartida
+PAGE_STATS_FLUSH = 5.0
+
+_page_stats = {PAGE_HITS_KEY: 0, PAGE_MISSES_KEY: 0}
+_page_stats_lock = threading.Lock()
+_page_stats_flushed = time.monotonic()
+
+
+def product_version_key(product_id):
+    return f'catalog:product:{product_id}:version'
+
+
+def _initial_version():
+    # Si la clave se pierde (expulsión, reinicio) la nueva versión nunca
+    # coincide con una anterior, así que no se reutilizan fragmentos viejos.
+    return int(time.time() * 1000)
+
+
+def product_version(product_id):
+    key = product_version_key(product_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_product_version(*product_ids):
+    for product_id in product_ids:
+        key = product_version_key(product_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+
+
+def catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _initial_version(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, _initial_version(), None)
+
+
+def _index_changes_key(generation):
+    return f'catalog:index:changes:{generation}'
+
+
+def publish_catalog_changes(product_ids=None):
+    # Llamar después del commit. product_ids=None pide reconstruir todo.
+    batch = {'ids': None if product_ids is None else list(product_ids)}
+    for _ in range(5):
+        try:
+            generation = cache.incr(INDEX_GENERATION_KEY)
+        except ValueError:
+            cache.add(INDEX_GENERATION_KEY, _initial_version(), None)
+            continue
+        # add() reserva la generación si dos workers incrementan a la vez
+        if cache.add(_index_changes_key(generation), batch, FRAGMENT_TIMEOUT):
+            return generation
+    return None
+
+
+def catalog_changes_since(generation):
+    # Devuelve (generación actual, productos cambiados desde generation), o
+    # None en lugar de los productos si el índice debe reconstruirse entero
+    current = cache.get(INDEX_GENERATION_KEY)
+    if current is None:
+        cache.add(INDEX_GENERATION_KEY, _initial_version(), None)
+        current = cache.get(INDEX_GENERATION_KEY)
+    if generation is None or current is None:
+        return current, None
+    if current == generation:
+        return current, set()
+    if current < generation or current - generation > INDEX_CHANGES_KEPT:
+        return current, None
+
+    keys = [_index_changes_key(number) for number in range(generation + 1, current + 1)]
+    batches = cache.get_many(keys)
+    changed = set()
+    for key in keys:
+        batch = batches.get(key)
+        if batch is None or batch['ids'] is None:
+            return current, None
+        changed.update(batch['ids'])
+    return current, changed
+
+
+def products_changed(product_ids):
+    # Para cambios que no envían señales (update, bulk_update) y para procesos
+    # fuera de los workers web: invalida las páginas y avisa a los índices
+    bump_product_version(*product_ids)
+    bump_catalog_version()
+    publish_catalog_changes(product_ids)
+
+
+def _incr(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+
+def flush_page_stats():
+    global _page_stats_flushed
+    with _page_stats_lock:
+        pending = dict(_page_stats)
+        for key in _page_stats:
+            _page_stats[key] = 0
+        _page_stats_flushed = time.monotonic()
+    for key, delta in pending.items():
+        if delta:
+            _incr(key, delta)
+
+
+def _count(key):
+    # Se acumula en el proceso y se vuelca cada PAGE_STATS_FLUSH segundos, así
+    # un acierto no escribe en la cache compartida
+    with _page_stats_lock:
+        _page_stats[key] += 1
+        due = time.monotonic() - _page_stats_flushed >= PAGE_STATS_FLUSH
+    if due:
+        flush_page_stats()
+
+
+def page_cache_stats():
+    flush_page_stats()
+    hits = cache.get(PAGE_HITS_KEY, 0)
+    misses = cache.get(PAGE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 3) if total else 0.0,
+        'catalog_version': catalog_version(),
+    }
+
+
+def page_cache_key(request):
+    location = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{catalog_version()}:{location}'
+
+
+def _cacheable(request, response):
+    return response.status_code == 200 and not response.cookies and not getattr(response, 'streaming', False)
+
+
+def anonymous_page_cache(timeout=PAGE_TIMEOUT):
+    # Cachea la respuesta completa de los GETs. Las plantillas cacheadas no
+    # contienen datos del usuario: el saludo, el carrito y el enlace de perfil
+    # son huecos que PersonalizationMiddleware rellena en cada respuesta.
+    # Solo un worker regenera una entrada caducada; los demás esperan.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            key = page_cache_key(request)
+            response = cache.get(key)
+            if response is not None:
+                _count(PAGE_HITS_KEY)
+                response['X-Page-Cache'] = 'HIT'
+                return response
+
+            lock_key = f'{key}:lock'
+            if not cache.add(lock_key, 1, PAGE_LOCK_TIMEOUT):
+                waited = 0.0
+                while waited < PAGE_WAIT:
+                    time.sleep(PAGE_WAIT_STEP)
+                    waited += PAGE_WAIT_STEP
+                    response = cache.get(key)
+                    if response is not None:
+                        _count(PAGE_HITS_KEY)
+                        response['X-Page-Cache'] = 'HIT'
+                        return response
+                lock_key = None
+
+            _count(PAGE_MISSES_KEY)
+            try:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+                if _cacheable(request, response):
+                    cache.set(key, response, timeout)
+            finally:
+                if lock_key:
+                    cache.delete(lock_key)
+            response['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
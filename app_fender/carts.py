@@ -0,0 +1,180 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Cart, CartItem, ProductVariant
+
+# Carrito anónimo: {variant_id: cantidad} dentro de la sesión. No se crean
+# filas Cart/CartItem hasta que el usuario inicia sesión.
+SESSION_KEY = 'cart'
+
+
+class SessionCartLine:
+    # Misma interfaz que CartItem para que cart.html no distinga el origen;
+    # el id de la línea es el id de la variante.
+    def __init__(self, product_variant, quantity):
+        self.id = product_variant.id
+        self.product_variant = product_variant
+        self.quantity = quantity
+
+    @property
+    def line_total(self):
+        return self.quantity * self.product_variant.price
+
+    def get_total_item_price(self):
+        return self.line_total
+
+
+def _upsert_item(cart, variant_id, quantity, increment):
+    # Upsert atómico: inserta la línea o actualiza la cantidad (sumando o
+    # reemplazando), solo si la variante tiene stock suficiente para el total
+    # resultante. Devuelve False si no se modificó nada (variante inexistente
+    # o sin stock).
+    item_table = CartItem._meta.db_table
+    variant_table = ProductVariant._meta.db_table
+    new_quantity = f'{item_table}.quantity + excluded.quantity' if increment else 'excluded.quantity'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {item_table} (cart_id, product_variant_id, quantity) '
+            f'SELECT %s, id, %s FROM {variant_table} WHERE id = %s AND stock >= %s '
+            f'ON CONFLICT (cart_id, product_variant_id) DO UPDATE '
+            f'SET quantity = {new_quantity} '
+            f'WHERE {new_quantity} <= '
+            f'(SELECT stock FROM {variant_table} WHERE id = excluded.product_variant_id)',
+            [cart.pk, quantity, variant_id, quantity],
+        )
+        return cursor.rowcount > 0
+
+
+def add_item(cart, variant_id, quantity):
+    return _upsert_item(cart, variant_id, quantity, increment=True)
+
+
+def set_item_quantity(cart, variant_id, quantity):
+    if quantity < 1:
+        return remove_variant(cart, variant_id)
+    return _upsert_item(cart, variant_id, quantity, increment=False)
+
+
+def remove_variant(cart, variant_id):
+    deleted, _ = CartItem.objects.filter(cart=cart, product_variant_id=variant_id).delete()
+    return deleted > 0
+
+
+def _decrement(items):
+    if items.filter(quantity__gt=1).update(quantity=F('quantity') - 1):
+        return True
+    # Solo se borra si sigue en 1: otra petición pudo subir la cantidad entre medias
+    deleted, _ = items.filter(quantity__lte=1).delete()
+    return deleted > 0
+
+
+def decrement_item(cart, item_id):
+    return _decrement(CartItem.objects.filter(id=item_id, cart=cart))
+
+
+def decrement_variant(cart, variant_id):
+    return _decrement(CartItem.objects.filter(cart=cart, product_variant_id=variant_id))
+
+
+def remove_item(cart, item_id):
+    deleted, _ = CartItem.objects.filter(id=item_id, cart=cart).delete()
+    return deleted > 0
+
+
+def session_cart(request):
+    return request.session.get(SESSION_KEY, {})
+
+
+def _save(request, items):
+    if items:
+        request.session[SESSION_KEY] = items
+    else:
+        request.session.pop(SESSION_KEY, None)
+
+
+def session_cart_add(request, variant_id, quantity):
+    items = dict(session_cart(request))
+    key = str(variant_id)
+    total = items.get(key, 0) + quantity
+    if not ProductVariant.objects.filter(pk=variant_id, stock__gte=total).exists():
+        return False
+    items[key] = total
+    _save(request, items)
+    return True
+
+
+def session_cart_set(request, variant_id, quantity):
+    if quantity < 1:
+        return session_cart_remove(request, variant_id)
+    if not ProductVariant.objects.filter(pk=variant_id, stock__gte=quantity).exists():
+        return False
+    items = dict(session_cart(request))
+    items[str(variant_id)] = quantity
+    _save(request, items)
+    return True
+
+
+def session_cart_remove(request, variant_id):
+    items = dict(session_cart(request))
+    found = items.pop(str(variant_id), None) is not None
+    _save(request, items)
+    return found
+
+
+def session_cart_decrement(request, variant_id):
+    items = dict(session_cart(request))
+    key = str(variant_id)
+    if key not in items:
+        return False
+    if items[key] > 1:
+        items[key] -= 1
+    else:
+        del items[key]
+    _save(request, items)
+    return True
+
+
+def session_cart_count(request):
+    if not request.session.session_key:
+        return 0
+    return sum(session_cart(request).values())
+
+
+def session_cart_lines(request):
+    items = session_cart(request)
+    if not items:
+        return []
+    variants = ProductVariant.objects.select_related('product').in_bulk([int(key) for key in items])
+    return [
+        SessionCartLine(variants[int(key)], quantity)
+        for key, quantity in items.items()
+        if int(key) in variants
+    ]
+
+
+def merge_session_cart(request, user):
+    items = request.session.pop(SESSION_KEY, None)
+    if not items:
+        return
+
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        existing = set(
+            CartItem.objects.filter(cart=cart, product_variant_id__in=[int(key) for key in items])
+            .values_list('product_variant_id', flat=True)
+        )
+        variant_ids = set(
+            ProductVariant.objects.filter(pk__in=[int(key) for key in items]).values_list('pk', flat=True)
+        )
+        new_items = []
+        for key, quantity in items.items():
+            variant_id = int(key)
+            if variant_id not in variant_ids:
+                continue
+            if variant_id in existing:
+                CartItem.objects.filter(cart=cart, product_variant_id=variant_id).update(
+                    quantity=F('quantity') + quantity
+                )
+            else:
+                new_items.append(CartItem(cart=cart, product_variant_id=variant_id, quantity=quantity))
+        CartItem.objects.bulk_create(new_items)
@@ -0,0 +1,49 @@
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Product, ProductVariant
+
+
+def first_variant_image():
+    # Misma variante que devolvía product.variants.first en las plantillas
+    return Subquery(
+        ProductVariant.objects.filter(product=OuterRef('pk')).order_by('pk').values('image')[:1]
+    )
+
+
+def variant_payload(variants):
+    # Datos que buy.html necesita para cambiar de color sin recargar la página
+    return [
+        {
+            'id': variant.id,
+            'color': variant.color,
+            'model_number': variant.model_number or '',
+            'price': str(variant.price),
+            'stock': variant.stock,
+            'image': variant.image.url if variant.image else '',
+            'secondary_image': variant.secondary_image.url if variant.secondary_image else '',
+            'youtube_link': variant.youtube_link or '',
+        }
+        for variant in variants
+    ]
+
+
+def product_cards(products=None):
+    if products is None:
+        products = Product.objects.all()
+
+    return products.select_related('category').annotate(
+        first_image=first_variant_image(),
+        variant_count=Count('variants'),
+        min_price=Min('variants__price'),
+        max_price=Max('variants__price'),
+        total_stock=Coalesce(Sum('variants__stock'), 0),
+    )
+
+
+def card_page(page):
+    # La página se elige con keyset sobre Product sin anotar (índice name, id);
+    # el GROUP BY de product_cards solo recorre las filas de esa página
+    cards = product_cards(Product.objects.filter(pk__in=[product.pk for product in page])).in_bulk()
+    page.object_list = [cards[product.pk] for product in page if product.pk in cards]
+    return page
@@ -0,0 +1,235 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from . import search, stats
+from .caching import bump_catalog_version, bump_product_version, publish_catalog_changes
+from .models import Category, Product, ProductVariant
+
+BATCH_SIZE = 1000
+# Con más productos afectados se reconstruye todo el índice FTS de una vez
+REINDEX_THRESHOLD = 500
+
+PRODUCT_FIELDS = ('name',)
+VARIANT_FIELDS = ('product', 'color', 'price', 'image')
+# Columnas opcionales: solo se sobrescriben si el archivo las trae
+OPTIONAL_PRODUCT_FIELDS = ('description', 'category')
+OPTIONAL_VARIANT_FIELDS = ('stock', 'secondary_image', 'youtube_link')
+
+
+class RowError(Exception):
+    pass
+
+
+def read_rows(path):
+    # (número de línea, dict) para CSV con cabecera o JSONL (un objeto por línea)
+    with open(path, newline='', encoding='utf-8') as source:
+        if path.endswith('.jsonl') or path.endswith('.ndjson'):
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as error:
+                    yield line_number, RowError(f'Invalid JSON: {error}')
+                    continue
+                yield line_number, row if isinstance(row, dict) else RowError('Expected a JSON object.')
+        else:
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def _text(row, name, max_length, required=True):
+    value = str(row.get(name) or '').strip()
+    if required and not value:
+        raise RowError(f'"{name}" is required.')
+    if len(value) > max_length:
+        raise RowError(f'"{name}" is longer than {max_length} characters.')
+    return value
+
+
+def _image(row, name, required=True):
+    # Ruta relativa a MEDIA_ROOT (p. ej. products/strat.png); el archivo no se copia
+    path = _text(row, name, 100, required).replace('\\', '/')
+    if path.startswith('/') or '..' in path.split('/'):
+        raise RowError(f'"{name}" must be a relative path inside the media folder.')
+    return path or None
+
+
+def parse_price(value):
+    # También la usa stock_sync; lanza ValueError con el mensaje para el usuario
+    try:
+        price = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError('"price" must be a number.')
+    # NaN e Infinity son Decimal válidos, pero compararlos lanza InvalidOperation
+    if not price.is_finite():
+        raise ValueError('"price" must be a finite number.')
+    if price < 0 or price >= Decimal('1e8'):
+        raise ValueError('"price" is out of range.')
+    return price.quantize(Decimal('0.01'))
+
+
+def clean(row):
+    if not isinstance(row, dict):
+        raise RowError(str(row))
+    name = _text(row, 'product', 255)
+    cleaned = {
+        'category': _text(row, 'category', 255, required=False),
+        'product': name,
+        'slug': slugify(_text(row, 'slug', 255, required=False) or name),
+        'description': str(row.get('description') or '').strip(),
+        'color': _text(row, 'color', 100),
+        'model_number': _text(row, 'model_number', 100),
+        'image': _image(row, 'image'),
+        'secondary_image': _image(row, 'secondary_image', required=False),
+        'youtube_link': _text(row, 'youtube_link', 200, required=False) or None,
+        'columns': set(row),
+    }
+    if not cleaned['slug']:
+        raise RowError('Could not build a slug from the product name.')
+    try:
+        cleaned['price'] = parse_price(row.get('price', ''))
+    except ValueError as error:
+        raise RowError(str(error))
+    try:
+        cleaned['stock'] = int(str(row.get('stock') or 0).strip())
+    except ValueError:
+        raise RowError('"stock" must be a whole number.')
+    if cleaned['stock'] < 0:
+        raise RowError('"stock" cannot be negative.')
+    return cleaned
+
+
+class CatalogImporter:
+    def __init__(self, batch_size=BATCH_SIZE, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.categories = dict(Category.objects.values_list('name', 'pk'))
+        self.errors = []
+        self.created = 0
+        self.updated = 0
+        self.product_ids = set()
+
+    def run(self, rows):
+        batch = []
+        for line_number, row in rows:
+            try:
+                batch.append((line_number, clean(row)))
+            except RowError as error:
+                self.errors.append((line_number, str(error)))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        if not self.dry_run:
+            self._refresh_indexes()
+        return self
+
+    def _import_batch(self, batch):
+        # Cada lote es una transacción corta; en dry-run se deshace al final
+        columns = set().union(*(row['columns'] for _, row in batch))
+        self.product_fields = PRODUCT_FIELDS + tuple(f for f in OPTIONAL_PRODUCT_FIELDS if f in columns)
+        self.variant_fields = VARIANT_FIELDS + tuple(f for f in OPTIONAL_VARIANT_FIELDS if f in columns)
+        with transaction.atomic():
+            new_categories = self._resolve_categories(batch)
+            product_ids = self._upsert_products(batch)
+            existing = set(
+                ProductVariant.objects.filter(model_number__in=[row['model_number'] for _, row in batch])
+                .values_list('model_number', flat=True)
+            )
+            imported = self._upsert_variants(batch, product_ids)
+            for _, row in imported:
+                if row['model_number'] in existing:
+                    self.updated += 1
+                else:
+                    self.created += 1
+            self.product_ids.update(product_ids[row['slug']] for _, row in imported)
+            if self.dry_run:
+                transaction.set_rollback(True)
+        if self.dry_run:
+            for name in new_categories:
+                self.categories.pop(name, None)
+
+    def _resolve_categories(self, batch):
+        missing = {row['category'] for _, row in batch if row['category'] and row['category'] not in self.categories}
+        if not missing:
+            return []
+        Category.objects.bulk_create(
+            [Category(name=name, slug=slugify(name)) for name in missing], ignore_conflicts=True
+        )
+        self.categories.update(Category.objects.filter(name__in=missing).values_list('name', 'pk'))
+        return list(missing)
+
+    def _upsert_products(self, batch):
+        products = {}
+        for _, row in batch:
+            products[row['slug']] = Product(
+                name=row['product'],
+                slug=row['slug'],
+                description=row['description'],
+                category_id=self.categories.get(row['category']),
+            )
+        Product.objects.bulk_create(
+            products.values(), update_conflicts=True, unique_fields=['slug'], update_fields=self.product_fields,
+        )
+        return dict(Product.objects.filter(slug__in=products).values_list('slug', 'pk'))
+
+    def _variant(self, row, product_ids):
+        return ProductVariant(
+            product_id=product_ids[row['slug']],
+            color=row['color'],
+            model_number=row['model_number'],
+            price=row['price'],
+            stock=row['stock'],
+            image=row['image'],
+            secondary_image=row['secondary_image'],
+            youtube_link=row['youtube_link'],
+        )
+
+    def _upsert_variants(self, batch, product_ids):
+        # Si el lote completo choca con otra restricción (producto + color),
+        # se repite fila por fila para saber cuál falla
+        rows = list({row['model_number']: (line_number, row) for line_number, row in batch}.values())
+        try:
+            with transaction.atomic():
+                ProductVariant.objects.bulk_create(
+                    [self._variant(row, product_ids) for _, row in rows],
+                    update_conflicts=True, unique_fields=['model_number'], update_fields=self.variant_fields,
+                )
+            return rows
+        except IntegrityError:
+            pass
+
+        imported = []
+        for line_number, row in rows:
+            try:
+                with transaction.atomic():
+                    ProductVariant.objects.bulk_create(
+                        [self._variant(row, product_ids)],
+                        update_conflicts=True, unique_fields=['model_number'], update_fields=self.variant_fields,
+                    )
+                imported.append((line_number, row))
+            except IntegrityError as error:
+                self.errors.append((line_number, f'Could not save variant: {error}'))
+        return imported
+
+    def _refresh_indexes(self):
+        # bulk_create no envía señales: se hace aquí lo que harían signals.py
+        with transaction.atomic():
+            if len(self.product_ids) > REINDEX_THRESHOLD:
+                search.rebuild_index()
+            else:
+                for product_id in self.product_ids:
+                    search.index_product(product_id)
+        # El comando corre en su propio proceso: los índices en memoria de los
+        # workers web se actualizan al ver la nueva generación en la cache compartida
+        bump_product_version(*self.product_ids)
+        bump_catalog_version()
+        publish_catalog_changes(None if len(self.product_ids) > REINDEX_THRESHOLD else self.product_ids)
+        stats.reconcile()
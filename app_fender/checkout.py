@@ -0,0 +1,106 @@
+from datetime import timedelta
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery
+
+from .caching import products_changed
+from .models import CartItem, IdempotencyKey, OrderItem, ProductVariant
+from .reservations import available_to_sell, held_quantity, release
+from .summaries import cart_summary
+from .tasks import enqueue
+
+# Tiempo que se conservan las claves (purge_abandoned_carts borra las anteriores)
+IDEMPOTENCY_TTL = timedelta(hours=24)
+IDEMPOTENCY_KEY_LENGTH = 64
+
+
+class OutOfStock(Exception):
+    def __init__(self, lines):
+        super().__init__('Not enough stock for some cart lines.')
+        # Líneas del carrito con .available = stock disponible de la variante
+        self.lines = lines
+
+
+def shortages(cart):
+    lines = list(CartItem.objects.filter(cart=cart).select_related('product_variant__product'))
+    available = dict(
+        available_to_sell(exclude_cart=cart)
+        .filter(pk__in=[line.product_variant_id for line in lines])
+        .values_list('pk', 'available')
+    )
+    short = []
+    for line in lines:
+        line.available = max(available.get(line.product_variant_id, 0), 0)
+        if line.quantity > line.available:
+            short.append(line)
+    return short
+
+
+def idempotency_key(request):
+    # Campo oculto del formulario o cabecera Idempotency-Key para clientes de API
+    key = request.POST.get('idempotency_key') or request.headers.get('Idempotency-Key') or ''
+    key = key.strip()
+    return key if 0 < len(key) <= IDEMPOTENCY_KEY_LENGTH else None
+
+
+def previous_order(user, key):
+    if not key:
+        return None
+    record = IdempotencyKey.objects.filter(user=user, key=key).select_related('order').first()
+    return record.order if record else None
+
+
+def place_order(cart, order, key=None):
+    # Una transacción corta. La primera sentencia descuenta el stock de todas
+    # las variantes del carrito de una vez (stock = stock - n WHERE stock >= n),
+    # así el bloqueo de escritura se toma antes de leer precios y cantidades y
+    # dos compradores del mismo SKU no pueden vender unidades que no existen.
+    # Las unidades retenidas por reservas vigentes de otros carritos no cuentan.
+    # Con una clave de idempotencia ya usada se devuelve el pedido original.
+    quantity = CartItem.objects.filter(cart=cart, product_variant=OuterRef('pk')).values('quantity')
+    try:
+        with transaction.atomic():
+            previous = previous_order(order.user, key)
+            if previous is not None:
+                return previous
+
+            updated = ProductVariant.objects.filter(
+                pk__in=CartItem.objects.filter(cart=cart).values('product_variant'),
+                stock__gte=Subquery(quantity) + held_quantity(exclude_cart=cart),
+            ).update(stock=F('stock') - Subquery(quantity))
+            line_count = CartItem.objects.filter(cart=cart).count()
+            if not line_count or updated != line_count:
+                raise OutOfStock([])
+
+            lines = cart_summary(cart)
+            order.total_amount = lines.total_price
+            order.save()
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product_variant=line.product_variant,
+                    quantity=line.quantity,
+                    price=line.product_variant.price,
+                )
+                for line in lines
+            ])
+            CartItem.objects.filter(cart=cart).delete()
+            release(cart)
+            # update() no envía post_save: facetas, versiones y páginas en caché
+            # se enteran del nuevo stock tras el commit
+            transaction.on_commit(partial(products_changed, {line.product_variant.product_id for line in lines}))
+            if key:
+                IdempotencyKey.objects.create(user=order.user, key=key, order=order)
+            # El correo lo manda el worker (run_tasks); el pedido no espera al SMTP
+            enqueue('send_order_confirmation', {'order_id': order.pk})
+    except OutOfStock:
+        # Tras el rollback el stock vuelve a su valor real
+        raise OutOfStock(shortages(cart)) from None
+    except IntegrityError:
+        # Otra petición con la misma clave terminó primero
+        previous = previous_order(order.user, key)
+        if previous is None:
+            raise
+        return previous
+    return order
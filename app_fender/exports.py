@@ -0,0 +1,118 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Order, OrderItem
+
+BATCH_SIZE = 2000
+FORMATS = ('csv', 'jsonl')
+
+ORDER_FIELDS = [
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('user_email', 'user__email'),
+    ('status', 'status'),
+    ('is_paid', 'is_paid'),
+    ('total_amount', 'total_amount'),
+    ('shipping_full_name', 'shipping_full_name'),
+    ('shipping_address_line1', 'shipping_address_line1'),
+    ('shipping_address_line2', 'shipping_address_line2'),
+    ('shipping_city', 'shipping_city'),
+    ('shipping_state', 'shipping_state'),
+    ('shipping_postal_code', 'shipping_postal_code'),
+    ('shipping_country', 'shipping_country'),
+    ('shipping_phone', 'shipping_phone'),
+]
+
+ITEM_FIELDS = [
+    ('id', 'id'),
+    ('order_id', 'order_id'),
+    ('order_created_at', 'order__created_at'),
+    ('order_status', 'order__status'),
+    ('product', 'product_variant__product__name'),
+    ('color', 'product_variant__color'),
+    ('model_number', 'product_variant__model_number'),
+    ('quantity', 'quantity'),
+    ('price', 'price'),
+]
+
+EXPORTS = {
+    'orders': (Order, ORDER_FIELDS, ''),
+    'items': (OrderItem, ITEM_FIELDS, 'order__'),
+}
+
+
+def parse_filters(params):
+    # from / to (AAAA-MM-DD, ambos incluidos) y status; ValueError si no son válidos
+    filters = {}
+    for name in ('from', 'to'):
+        value = params.get(name)
+        if not value:
+            continue
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date for "{name}": {value}')
+        filters[name] = timezone.make_aware(datetime.combine(day, time.min))
+    status = params.get('status')
+    if status:
+        if status not in dict(Order.STATUS_CHOICES):
+            raise ValueError(f'Invalid status: {status}')
+        filters['status'] = status
+    return filters
+
+
+def _queryset(kind, filters):
+    model, fields, prefix = EXPORTS[kind]
+    queryset = model.objects.all()
+    if 'from' in filters:
+        queryset = queryset.filter(**{f'{prefix}created_at__gte': filters['from']})
+    if 'to' in filters:
+        queryset = queryset.filter(**{f'{prefix}created_at__lt': filters['to'] + timedelta(days=1)})
+    if 'status' in filters:
+        queryset = queryset.filter(**{f'{prefix}status': filters['status']})
+    return queryset.values_list(*[lookup for _, lookup in fields])
+
+
+def rows(kind, filters, batch_size=BATCH_SIZE):
+    # Lotes por clave (id > último id): cada lote es una consulta corta que se
+    # lee completa, así no queda una lectura abierta durante toda la descarga
+    # bloqueando las escrituras del checkout en SQLite. Memoria: un lote.
+    queryset = _queryset(kind, filters).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        yield from batch
+        last_pk = batch[-1][0]
+
+
+def header(kind):
+    return [name for name, _ in EXPORTS[kind][1]]
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream(kind, filters, output_format='csv', batch_size=BATCH_SIZE):
+    # Genera el archivo línea a línea (para StreamingHttpResponse o un archivo)
+    names = header(kind)
+    if output_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names)
+        for row in rows(kind, filters, batch_size):
+            yield writer.writerow([_value(value) for value in row])
+    else:
+        for row in rows(kind, filters, batch_size):
+            yield json.dumps(dict(zip(names, map(_value, row))), default=str) + '\n'
@@ -0,0 +1,215 @@
+from decimal import Decimal
+
+from .indexes import CatalogIndex
+from .models import Product, ProductVariant
+
+# (clave, etiqueta, mínimo incluido, máximo excluido)
+PRICE_BUCKETS = [
+    ('0-250', 'Under $250', Decimal('0'), Decimal('250')),
+    ('250-500', '$250 - $500', Decimal('250'), Decimal('500')),
+    ('500-1000', '$500 - $1,000', Decimal('500'), Decimal('1000')),
+    ('1000-2000', '$1,000 - $2,000', Decimal('1000'), Decimal('2000')),
+    ('2000+', '$2,000+', Decimal('2000'), None),
+]
+
+FACETS = [
+    ('categories', 'Category'),
+    ('color', 'Color'),
+    ('price', 'Price'),
+    ('in_stock', 'Availability'),
+]
+
+IN_STOCK = '1'
+
+
+def price_bucket(price):
+    for key, _, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return key
+    return None
+
+
+# Productos consultados por lote al refrescar; SQLite limita los parámetros de un IN
+LOAD_CHUNK = 500
+
+
+class FacetIndex(CatalogIndex):
+    # Un bitmap (entero de Python) por valor de faceta; el bit i corresponde a
+    # la variante del slot i. Las variantes de un producto ocupan slots
+    # contiguos, así que al intersecar facetas una misma variante debe cumplir
+    # color, precio y disponibilidad a la vez; después cada tramo se reduce a
+    # un bit por producto. La categoría marca todo el tramo y un producto sin
+    # variantes ocupa un slot que solo tiene su categoría.
+
+    def _reset(self):
+        self.slot_products = []
+        self.ranges = {}
+        self.ends = 0
+        self.live = 0
+        self.dead = 0
+        self.bitmaps = {name: {} for name, _ in FACETS}
+        self.labels = {name: {} for name, _ in FACETS}
+        self.labels['price'] = {key: label for key, label, _, _ in PRICE_BUCKETS}
+        self.labels['in_stock'] = {IN_STOCK: 'In stock'}
+        self._memberships = {}
+        self._fill = None
+
+    def _load(self, product_ids=None):
+        if product_ids is None:
+            return self._load_chunk(None)
+        entries = {}
+        product_ids = list(product_ids)
+        for start in range(0, len(product_ids), LOAD_CHUNK):
+            entries.update(self._load_chunk(product_ids[start:start + LOAD_CHUNK]))
+        return entries
+
+    def _load_chunk(self, product_ids):
+        products = Product.objects.select_related('category')
+        variants = ProductVariant.objects.all()
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+            variants = variants.filter(product_id__in=product_ids)
+
+        # {producto: (categorías, [valores de cada variante])}
+        entries = {}
+        for product in products.only('id', 'category__slug', 'category__name'):
+            categories = set()
+            if product.category:
+                categories.add(product.category.slug)
+                self.labels['categories'][product.category.slug] = product.category.name
+            entries[product.pk] = (categories, [])
+
+        for product_id, color, price, stock in variants.values_list('product_id', 'color', 'price', 'stock'):
+            entry = entries.get(product_id)
+            if entry is None:
+                continue
+            key = color.strip().lower()
+            self.labels['color'].setdefault(key, color.strip())
+            bucket = price_bucket(price)
+            entry[1].append({
+                'color': {key},
+                'price': {bucket} if bucket else set(),
+                'in_stock': {IN_STOCK} if stock > 0 else set(),
+            })
+        return entries
+
+    def _set(self, product_id, entry):
+        categories, variants = entry
+        start = len(self.slot_products)
+        size = max(len(variants), 1)
+        span = ((1 << size) - 1) << start
+        self.slot_products.extend([product_id] * size)
+        self.ranges[product_id] = (start, size)
+        self.ends |= 1 << (start + size - 1)
+        self.live |= span
+        self._fill = None
+
+        touched = {name: set() for name, _ in FACETS}
+        bitmaps = self.bitmaps['categories']
+        for key in categories:
+            bitmaps[key] = bitmaps.get(key, 0) | span
+            touched['categories'].add(key)
+        for offset, values in enumerate(variants):
+            bit = 1 << (start + offset)
+            for name, keys in values.items():
+                bitmaps = self.bitmaps[name]
+                for key in keys:
+                    bitmaps[key] = bitmaps.get(key, 0) | bit
+                    touched[name].add(key)
+        self._memberships[product_id] = touched
+
+    def _clear(self, product_id):
+        span = self.ranges.pop(product_id, None)
+        touched = self._memberships.pop(product_id, None)
+        if span is None:
+            return
+        start, size = span
+        mask = ~(((1 << size) - 1) << start)
+        for name, keys in (touched or {}).items():
+            bitmaps = self.bitmaps[name]
+            for key in keys:
+                bitmaps[key] &= mask
+        self.live &= mask
+        # El tramo queda vacío hasta la próxima reconstrucción
+        self.slot_products[start:start + size] = [None] * size
+        self.dead += size
+
+    def _build(self):
+        for product_id, entry in self._load().items():
+            self._set(product_id, entry)
+
+    def _apply(self, product_ids):
+        entries = self._load(product_ids)
+        for product_id in product_ids:
+            self._clear(product_id)
+            if product_id in entries:
+                self._set(product_id, entries[product_id])
+        # Compacta cuando la mitad de los slots ya no son válidos
+        if self.dead > len(self.slot_products) // 2:
+            self._rebuild()
+
+    def _selection_bitmap(self, name, keys):
+        bitmaps = self.bitmaps[name]
+        bitmap = 0
+        for key in keys:
+            bitmap |= bitmaps.get(key, 0)
+        return bitmap
+
+    def _product_bits(self, bits):
+        # Un bit por producto (el último slot de su tramo) si alguna de sus
+        # variantes está en bits: sumar unos al resto del tramo lleva el
+        # acarreo justo hasta ese último slot y no más allá
+        if self._fill is None:
+            self._fill = ((1 << len(self.slot_products)) - 1) & ~self.ends
+        return (((bits & ~self.ends) + self._fill) | bits) & self.ends
+
+    def search(self, selected):
+        # selected: {faceta: set(valores)}. OR dentro de una faceta, AND entre facetas.
+        self.refresh()
+        selected = {name: set(keys) for name, keys in selected.items() if keys and name in self.bitmaps}
+
+        with self._lock:
+            everything = self.live
+            chosen = {name: self._selection_bitmap(name, keys) for name, keys in selected.items()}
+
+            matched = everything
+            for bitmap in chosen.values():
+                matched &= bitmap
+
+            facets = []
+            for name, label in FACETS:
+                # Los conteos de una faceta ignoran su propia selección
+                base = everything
+                for other, bitmap in chosen.items():
+                    if other != name:
+                        base &= bitmap
+                values = []
+                for key, bitmap in self.bitmaps[name].items():
+                    count = self._product_bits(base & bitmap).bit_count()
+                    if count or key in selected.get(name, ()):
+                        values.append({
+                            'value': key,
+                            'label': self.labels[name].get(key, key),
+                            'count': count,
+                            'selected': key in selected.get(name, ()),
+                        })
+                if name == 'price':
+                    order = [key for key, _, _, _ in PRICE_BUCKETS]
+                    values.sort(key=lambda value: order.index(value['value']))
+                else:
+                    values.sort(key=lambda value: value['label'].lower())
+                facets.append({'name': name, 'label': label, 'values': values})
+
+            product_ids = None
+            if selected:
+                bits = bin(self._product_bits(matched))[:1:-1]
+                product_ids = [self.slot_products[slot] for slot, bit in enumerate(bits) if bit == '1']
+
+        return product_ids, facets
+
+
+index = FacetIndex()
+
+
+def selected_facets(params):
+    return {name: set(params.getlist(name)) for name, _ in FACETS}
@@ -0,0 +1,149 @@
+import unicodedata
+
+try:
+    import numpy as np
+except ImportError:  # sin NumPy no hay sugerencias difusas
+    np = None
+
+from .indexes import CatalogIndex
+from .models import Product, ProductVariant
+
+MIN_SCORE = 0.45
+MAX_SUGGESTIONS = 5
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ''.join(char if char.isalnum() else ' ' for char in text.lower()).split()
+
+
+def trigrams(text):
+    # Mismo relleno que pg_trgm: dos espacios al inicio y uno al final de cada palabra
+    grams = set()
+    for word in normalize(text):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex(CatalogIndex):
+    def _reset(self):
+        self.texts = []
+        self.product_ids = []
+        self.sizes = []
+        self.alive = []
+        self._postings = {}
+        self._arrays = {}
+        self._slots = {}
+        self._dead = 0
+        self._vectors = None
+
+    def _add(self, product_id, text):
+        grams = trigrams(text)
+        if not grams:
+            return
+        slot = len(self.texts)
+        self.texts.append(text)
+        self.product_ids.append(product_id)
+        self.sizes.append(len(grams))
+        self.alive.append(True)
+        self._slots.setdefault(product_id, []).append(slot)
+        self._vectors = None
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(slot)
+            self._arrays.pop(gram, None)
+
+    def _remove(self, product_id):
+        for slot in self._slots.pop(product_id, []):
+            self.alive[slot] = False
+            self._dead += 1
+            self._vectors = None
+
+    def _terms(self, product_ids=None):
+        products = Product.objects.all()
+        variants = ProductVariant.objects.exclude(model_number__isnull=True).exclude(model_number='')
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+            variants = variants.filter(product_id__in=product_ids)
+        terms = list(products.values_list('pk', 'name'))
+        terms += list(variants.values_list('product_id', 'model_number'))
+        return terms
+
+    def _build(self):
+        for product_id, text in self._terms():
+            self._add(product_id, text)
+
+    def _apply(self, product_ids):
+        for product_id in product_ids:
+            self._remove(product_id)
+        for product_id, text in self._terms(product_ids):
+            self._add(product_id, text)
+        # Compacta cuando la mitad de las entradas ya no son válidas
+        if self._dead > len(self.texts) // 2:
+            self._rebuild()
+
+    def _posting_array(self, gram):
+        array = self._arrays.get(gram)
+        if array is None:
+            array = np.fromiter(self._postings[gram], dtype=np.int32)
+            self._arrays[gram] = array
+        return array
+
+    def _size_and_alive_vectors(self):
+        if self._vectors is None:
+            self._vectors = (
+                np.asarray(self.sizes, dtype=np.float32),
+                np.asarray(self.alive, dtype=bool),
+            )
+        return self._vectors
+
+    def suggest(self, query, limit=MAX_SUGGESTIONS, min_score=MIN_SCORE):
+        if np is None:
+            return []
+        self.refresh()
+
+        grams = [gram for gram in trigrams(query) if gram in self._postings]
+        query_size = len(trigrams(query))
+        if not grams or not query_size:
+            return []
+
+        with self._lock:
+            postings = np.concatenate([self._posting_array(gram) for gram in grams])
+            shared = np.bincount(postings, minlength=len(self.texts)).astype(np.float32)
+            sizes, alive = self._size_and_alive_vectors()
+            texts = self.texts
+            product_ids = self.product_ids
+
+        # Cobertura de la consulta con un desempate por similitud de Jaccard
+        coverage = shared / query_size
+        jaccard = shared / (query_size + sizes - shared)
+        scores = np.where(alive, 0.7 * coverage + 0.3 * jaccard, 0.0)
+
+        candidates = np.flatnonzero(scores >= min_score)
+        if not candidates.size:
+            return []
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        suggestions = []
+        seen = set()
+        for slot in candidates:
+            product_id = product_ids[slot]
+            if product_id in seen:
+                continue
+            seen.add(product_id)
+            suggestions.append({
+                'text': texts[slot],
+                'product_id': product_id,
+                'score': round(float(scores[slot]), 3),
+            })
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+
+index = TrigramIndex()
+
+
+def suggest(query, limit=MAX_SUGGESTIONS):
+    return index.suggest(query, limit=limit)
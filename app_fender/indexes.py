@@ -0,0 +1,66 @@
+import threading
+import time
+
+from django.db import DatabaseError
+
+from .caching import catalog_changes_since
+
+# Segundos entre lecturas de la generación compartida en cada proceso; entre
+# una y otra los índices responden solo desde memoria
+GENERATION_CHECK_INTERVAL = 2.0
+
+
+class CatalogIndex:
+    # Base de los índices en memoria (difuso, prefijos, facetas). Los cambios
+    # de este proceso llegan por mark_dirty; los de otros procesos, por la
+    # generación publicada en la cache compartida (caching.py). Las subclases
+    # implementan _reset(), _build() y _apply(product_ids).
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = set()
+        self._generation = None
+        self._checked_at = None
+        self._reset()
+
+    def mark_dirty(self, product_id):
+        with self._lock:
+            self._dirty.add(product_id)
+
+    def _rebuild(self):
+        self._reset()
+        self._build()
+        self._dirty.clear()
+        self._loaded = True
+
+    def _check_generation(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < GENERATION_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        generation, changed = catalog_changes_since(self._generation)
+        with self._lock:
+            self._generation = generation
+            if changed is None:
+                self._loaded = False
+            else:
+                self._dirty |= changed
+
+    def refresh(self):
+        self._check_generation()
+        with self._lock:
+            if not self._loaded:
+                self._rebuild()
+                return
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            self._apply(dirty)
+
+    def warm(self):
+        try:
+            self.refresh()
+        except DatabaseError:
+            # Base de datos sin migrar; se construirá en la primera consulta
+            pass
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app_fender import exports
+
+
+class Command(BaseCommand):
+    help = 'Streams orders or order items as CSV or JSONL (e.g. for the nightly finance dump).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(exports.EXPORTS))
+        parser.add_argument('--format', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--from', dest='from', help='First day to include (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='to', help='Last day to include (YYYY-MM-DD).')
+        parser.add_argument('--status')
+        parser.add_argument('--output', help='File to write; defaults to stdout.')
+        parser.add_argument('--batch-size', type=int, default=exports.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            filters = exports.parse_filters(options)
+        except ValueError as error:
+            raise CommandError(error)
+
+        lines = exports.stream(options['kind'], filters, options['format'], options['batch_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = -1 if options['format'] == 'csv' else 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f'Exported {count} {options["kind"]} to {options["output"]}.'))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_fender.catalog_import import BATCH_SIZE, CatalogImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Creates or updates products and variants from a CSV or JSONL file, matching variants by '
+            'model_number and products by slug.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row, or .jsonl with one object per line.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate and write every batch, then roll it back.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            importer = CatalogImporter(options['batch_size'], options['dry_run']).run(read_rows(options['path']))
+        except OSError as error:
+            raise CommandError(error)
+
+        for line_number, message in sorted(importer.errors):
+            self.stderr.write(f'Line {line_number}: {message}')
+
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {importer.created + importer.updated} variants ({importer.created} new, '
+            f'{importer.updated} updated) across {len(importer.product_ids)} products '
+            f'in {time.monotonic() - started:.1f}s; {len(importer.errors)} rows with errors.'
+        ))
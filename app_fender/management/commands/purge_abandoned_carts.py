@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from app_fender.checkout import IDEMPOTENCY_TTL
+from app_fender.models import Cart, CartItem, IdempotencyKey, StockReservation, Task
+
+
+class Command(BaseCommand):
+    help = ('Deletes abandoned carts, expired reservations, idempotency keys, finished tasks '
+            'and expired sessions in small batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Carts created more than this many days ago are considered abandoned.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=0.05,
+                            help='Seconds to pause between batches so other writers can take the lock.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        self.batch_size = options['batch_size']
+        self.pause = options['sleep']
+        self.dry_run = options['dry_run']
+
+        # Carritos anónimos antiguos (anteriores al carrito en sesión) y
+        # carritos de usuario vacíos; _get_cart los vuelve a crear si hace falta.
+        has_items = CartItem.objects.filter(cart=OuterRef('pk'))
+        carts = Cart.objects.filter(created_at__lt=cutoff).filter(
+            Q(user__isnull=True) | ~Exists(has_items)
+        )
+        deleted_carts, deleted_items = self._purge_carts(carts)
+
+        deleted_reservations = self._purge(StockReservation.objects.filter(expires_at__lte=timezone.now()))
+
+        deleted_keys = self._purge(IdempotencyKey.objects.filter(created_at__lt=timezone.now() - IDEMPOTENCY_TTL))
+
+        # Las tareas fallidas se conservan para revisarlas desde el admin
+        deleted_tasks = self._purge(Task.objects.filter(status=Task.DONE, run_at__lt=cutoff))
+
+        deleted_sessions = 0
+        if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db':
+            deleted_sessions = self._purge(Session.objects.filter(expire_date__lt=timezone.now()))
+
+        verb = 'Would delete' if self.dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted_carts} carts, {deleted_items} cart items, '
+            f'{deleted_reservations} expired reservations, {deleted_keys} idempotency keys, '
+            f'{deleted_tasks} finished tasks and {deleted_sessions} expired sessions.'
+        ))
+
+    def _batches(self, queryset):
+        # Cada lote es una transacción corta; nunca se retiene el bloqueo de
+        # escritura de SQLite durante toda la limpieza.
+        queryset = queryset.order_by('pk').values_list('pk', flat=True)
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            pks = list(batch[:self.batch_size])
+            if not pks:
+                return
+            last_pk = pks[-1]
+            yield pks
+            if not self.dry_run and self.pause:
+                time.sleep(self.pause)
+
+    def _purge_carts(self, carts):
+        total_carts = total_items = 0
+        for pks in self._batches(carts):
+            items = CartItem.objects.filter(cart_id__in=pks)
+            if self.dry_run:
+                total_items += items.count()
+                total_carts += len(pks)
+                continue
+            with transaction.atomic():
+                total_items += items.delete()[0]
+                total_carts += Cart.objects.filter(pk__in=pks).delete()[0]
+        return total_carts, total_items
+
+    def _purge(self, queryset):
+        total = 0
+        for pks in self._batches(queryset):
+            if self.dry_run:
+                total += len(pks)
+                continue
+            with transaction.atomic():
+                total += queryset.model.objects.filter(pk__in=pks).delete()[0]
+        return total
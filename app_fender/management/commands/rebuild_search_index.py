@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_fender import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the FTS5 product search index from the catalog tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} products.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app_fender import stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the admin dashboard counters from the database tables.'
+
+    def handle(self, *args, **options):
+        keys = stats.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {len(keys)} counters.'))
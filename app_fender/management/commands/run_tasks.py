@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from app_fender import tasks
+
+
+def _run(item):
+    try:
+        return tasks.run(item)
+    finally:
+        # Cada hilo usa su propia conexión
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background tasks (confirmation emails, etc.).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2,
+                            help='Maximum number of tasks this worker runs at the same time.')
+        parser.add_argument('--visibility-timeout', type=int,
+                            default=int(tasks.VISIBILITY_TIMEOUT.total_seconds()),
+                            help='Seconds before a claimed task is handed to another worker.')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when there are no ready tasks instead of polling.')
+
+    def handle(self, *args, **options):
+        worker = tasks.worker_name()
+        concurrency = max(options['concurrency'], 1)
+        visibility = timedelta(seconds=options['visibility_timeout'])
+        done = failed = 0
+        running = set()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    close_old_connections()
+                    free = concurrency - len(running)
+                    claimed = tasks.claim(worker, free, visibility) if free else []
+                    for item in claimed:
+                        running.add(pool.submit(_run, item))
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    # Con todos los hilos ocupados se espera a que termine uno;
+                    # si no, se vuelve a buscar tareas tras poll_interval
+                    full = len(running) >= concurrency
+                    finished, running = wait(
+                        running, timeout=None if full else options['poll_interval'],
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for future in finished:
+                        if future.result():
+                            done += 1
+                        else:
+                            failed += 1
+            except KeyboardInterrupt:
+                pass
+
+        self.stdout.write(self.style.SUCCESS(f'{worker}: {done} tasks done, {failed} failed or retried.'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app_fender import stock_sync
+from app_fender.catalog_import import read_rows
+
+
+class Command(BaseCommand):
+    help = 'Applies stock and price updates by model_number from a CSV or JSONL file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV with model_number,stock,price columns, or .jsonl records.')
+
+    def handle(self, *args, **options):
+        try:
+            rows = list(read_rows(options['path']))
+        except OSError as error:
+            raise CommandError(error)
+
+        records = [row if isinstance(row, dict) else {} for _, row in rows]
+        results = stock_sync.apply_updates(records)
+        for (line_number, row), result in zip(rows, results):
+            if not isinstance(row, dict):
+                self.stderr.write(f'Line {line_number}: {row}')
+            elif result['error']:
+                self.stderr.write(f'Line {line_number}: {result["model_number"] or "?"}: {result["error"]}')
+
+        totals = stock_sync.summarize(results)
+        self.stdout.write(self.style.SUCCESS(', '.join(f'{count} {status}' for status, count in sorted(totals.items()))))
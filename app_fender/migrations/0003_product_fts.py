@@ -0,0 +1,45 @@
+from django.db import migrations
+
+FTS_TABLE = 'app_fender_product_fts'
+
+
+def populate_index(apps, schema_editor):
+    Product = apps.get_model('app_fender', 'Product')
+    ProductVariant = apps.get_model('app_fender', 'ProductVariant')
+
+    colors = {}
+    model_numbers = {}
+    for product_id, color, number in ProductVariant.objects.values_list('product_id', 'color', 'model_number'):
+        colors.setdefault(product_id, []).append(color)
+        if number:
+            model_numbers.setdefault(product_id, []).append(number)
+
+    rows = [
+        (pk, name, description, category or '', ' '.join(colors.get(pk, [])), ' '.join(model_numbers.get(pk, [])))
+        for pk, name, description, category in Product.objects.values_list('pk', 'name', 'description', 'category__name')
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description, category, colors, model_numbers) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_fender', '0002_order_status'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                'name, description, category, colors, model_numbers, '
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            ),
+            reverse_sql=f'DROP TABLE {FTS_TABLE}',
+        ),
+        migrations.RunPython(populate_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_fender', '0003_product_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['date_joined', 'id'], name='user_joined_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:30
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    CartItem = apps.get_model('app_fender', 'CartItem')
+    duplicates = (
+        CartItem.objects.values('cart_id', 'product_variant_id')
+        .annotate(rows=Count('id'), keep=Min('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        CartItem.objects.filter(id=row['keep']).update(quantity=row['total'])
+        CartItem.objects.filter(
+            cart_id=row['cart_id'], product_variant_id=row['product_variant_id']
+        ).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_fender', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product_variant'), name='unique_cart_variant'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_fender', '0005_cartitem_unique_cart_variant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='app_fender.cart')),
+                ('product_variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='app_fender.productvariant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product_variant', 'expires_at'], name='reservation_variant_exp_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cart', 'product_variant'), name='unique_reservation_cart_variant')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 22:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_fender', '0008_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
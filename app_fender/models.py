@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager
@@ -36,6 +38,11 @@ class CustomUser(AbstractUser):
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_joined_id_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -63,6 +70,11 @@ class Product(models.Model):
     description = models.TextField(blank=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
@@ -71,6 +83,12 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    def card_image_url(self):
+        # first_image viene anotado por catalog.product_cards
+        if not getattr(self, 'first_image', None):
+            return None
+        return ProductVariant._meta.get_field('image').storage.url(self.first_image)
+
 
 class ProductVariant(models.Model):
     product = models.ForeignKey(Product, related_name='variants', on_delete=models.CASCADE)
@@ -100,7 +118,14 @@ class Cart(models.Model):
         return f"Cart (Session: {self.session_key})"
 
     def get_total_price(self):
-        return sum(item.get_total_item_price() for item in self.items.all())
+        # Si viene anotado (summaries.carts_with_totals) no hace falta consultar
+        if hasattr(self, 'total_price'):
+            total = self.total_price
+        else:
+            total = self.items.aggregate(
+                total=models.Sum(models.F('quantity') * models.F('product_variant__price'))
+            )['total']
+        return Decimal(total or 0).quantize(Decimal('0.01'))
 
 
 class CartItem(models.Model):
@@ -108,6 +133,11 @@ class CartItem(models.Model):
     product_variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product_variant'], name='unique_cart_variant'),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.product_variant.product.name} ({self.product_variant.color})"
 
@@ -115,6 +145,25 @@ class CartItem(models.Model):
         return self.quantity * self.product_variant.price
 
 
+class StockReservation(models.Model):
+    # Retención temporal de stock mientras un carrito está en el checkout
+    cart = models.ForeignKey(Cart, related_name='reservations', on_delete=models.CASCADE)
+    product_variant = models.ForeignKey(ProductVariant, related_name='reservations', on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product_variant'], name='unique_reservation_cart_variant'),
+        ]
+        indexes = [
+            models.Index(fields=['product_variant', 'expires_at'], name='reservation_variant_exp_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_variant} held until {self.expires_at}"
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -138,10 +187,78 @@ class Order(models.Model):
     shipping_country = models.CharField(max_length=100)
     shipping_phone = models.CharField(max_length=20)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.email if self.user else 'Guest'}"
 
 
+class IdempotencyKey(models.Model):
+    # Clave enviada con el checkout; una repetición devuelve el pedido original
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    order = models.ForeignKey('Order', related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_user_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> Order {self.order_id}"
+
+
+class Task(models.Model):
+    # Trabajo en segundo plano; lo ejecuta el comando run_tasks (tasks.py)
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+            models.Index(fields=['status', 'locked_until'], name='task_status_locked_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class StatCounter(models.Model):
+    # Contadores del panel de administración (stats.py); se actualizan con
+    # señales y se recalculan si falta la fila
+    key = models.CharField(max_length=50, unique=True)
+    count = models.BigIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.count} / {self.amount}"
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     product_variant = models.ForeignKey(ProductVariant, on_delete=models.SET_NULL, null=True)
@@ -0,0 +1,130 @@
+import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import Q
+
+SALT = 'app_fender.pagination'
+PER_PAGE = 50
+# Por encima de esta cantidad de ids no se usa pk__in (límite de variables de SQLite)
+MAX_IN = 500
+SCAN_BATCH = 1000
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, prev_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def _field_name(order):
+    return order.lstrip('-')
+
+
+def _value(obj, field):
+    for part in field.split('__'):
+        obj = getattr(obj, part)
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return obj
+
+
+def encode_cursor(obj, ordering, direction):
+    values = [_value(obj, _field_name(order)) for order in ordering]
+    return signing.dumps({'d': direction, 'v': values}, salt=SALT)
+
+
+def decode_cursor(cursor, ordering):
+    try:
+        data = signing.loads(cursor, salt=SALT)
+    except signing.BadSignature:
+        return None, None
+    if data.get('d') not in ('next', 'prev') or len(data.get('v', [])) != len(ordering):
+        return None, None
+    return data['d'], data['v']
+
+
+def _reverse(ordering):
+    return [order[1:] if order.startswith('-') else f'-{order}' for order in ordering]
+
+
+def _after(ordering, values):
+    # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), respetando el sentido de cada campo
+    condition = Q()
+    equal = Q()
+    for order, value in zip(ordering, values):
+        field = _field_name(order)
+        lookup = 'lt' if order.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def _rows_in(queryset, ordering, pks, limit):
+    if len(pks) <= MAX_IN:
+        return list(queryset.filter(pk__in=pks)[:limit])
+    # Recorre las claves en el orden de la página y se queda con las de pks;
+    # solo las filas elegidas se cargan con sus anotaciones
+    keys = queryset.values_list('pk', *[_field_name(order) for order in ordering])
+    found = []
+    values = None
+    while len(found) < limit:
+        batch = keys if values is None else keys.filter(_after(ordering, values))
+        batch = list(batch[:SCAN_BATCH])
+        if not batch:
+            break
+        found += [row[0] for row in batch if row[0] in pks]
+        values = list(batch[-1][1:])
+    return list(queryset.filter(pk__in=found[:limit]))
+
+
+def keyset_page(queryset, ordering, cursor=None, per_page=PER_PAGE, only=None):
+    # only: conjunto opcional de pks a los que se limita la página
+    # Los campos de ordering no deben admitir NULL y el último debe ser único (p. ej. id)
+    direction, values = decode_cursor(cursor, ordering) if cursor else (None, None)
+
+    if direction == 'prev':
+        page_ordering = _reverse(ordering)
+    else:
+        page_ordering = list(ordering)
+
+    queryset = queryset.order_by(*page_ordering)
+    if values is not None:
+        queryset = queryset.filter(_after(page_ordering, values))
+
+    if only is None:
+        rows = list(queryset[:per_page + 1])
+    else:
+        rows = _rows_in(queryset, page_ordering, only, per_page + 1)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if direction == 'prev':
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, values is not None
+
+    next_cursor = encode_cursor(rows[-1], ordering, 'next') if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0], ordering, 'prev') if rows and has_previous else None
+    return KeysetPage(rows, next_cursor, prev_cursor)
@@ -0,0 +1,89 @@
+from bisect import bisect_left, insort
+
+from .fuzzy import normalize
+from .indexes import CatalogIndex
+from .models import Product, ProductVariant
+
+MAX_RESULTS = 8
+# Entradas recorridas como máximo por consulta antes de cortar
+MAX_SCAN = 200
+
+
+class PrefixIndex(CatalogIndex):
+    # Arreglo ordenado de (clave, tipo, texto, slug); bisect encuentra el
+    # primer candidato y se recorre mientras la clave conserve el prefijo.
+
+    def _reset(self):
+        self.entries = []
+        self._by_product = {}
+
+    def _product_entries(self, product_ids=None):
+        products = Product.objects.all()
+        variants = ProductVariant.objects.all()
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+            variants = variants.filter(product_id__in=product_ids)
+
+        slugs = {}
+        entries = {}
+        for pk, name, slug in products.values_list('pk', 'name', 'slug'):
+            slugs[pk] = slug
+            words = normalize(name)
+            # Cada sufijo por palabras permite que "tele" encuentre "Player Telecaster"
+            for start in range(len(words)):
+                entries.setdefault(pk, []).append((' '.join(words[start:]), 'product', name, slug))
+
+        for product_id, color, number in variants.values_list('product_id', 'color', 'model_number'):
+            slug = slugs.get(product_id)
+            if slug is None:
+                continue
+            if color:
+                entries.setdefault(product_id, []).append((' '.join(normalize(color)), 'color', color, slug))
+            if number:
+                entries.setdefault(product_id, []).append((' '.join(normalize(number)), 'model', number, slug))
+        return entries
+
+    def _build(self):
+        self._by_product = self._product_entries()
+        self.entries = sorted(entry for entries in self._by_product.values() for entry in entries)
+
+    def _remove(self, entry):
+        position = bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+
+    def _apply(self, product_ids):
+        fresh = self._product_entries(product_ids)
+        for product_id in product_ids:
+            for entry in self._by_product.pop(product_id, []):
+                self._remove(entry)
+            for entry in fresh.get(product_id, []):
+                insort(self.entries, entry)
+            if product_id in fresh:
+                self._by_product[product_id] = fresh[product_id]
+
+    def lookup(self, prefix, limit=MAX_RESULTS):
+        key = ' '.join(normalize(prefix))
+        if not key:
+            return []
+        self.refresh()
+
+        results = []
+        seen = set()
+        with self._lock:
+            entries = self.entries
+            position = bisect_left(entries, (key,))
+            end = min(position + MAX_SCAN, len(entries))
+            while position < end and entries[position][0].startswith(key):
+                _, kind, text, slug = entries[position]
+                position += 1
+                if (kind, text) in seen:
+                    continue
+                seen.add((kind, text))
+                results.append({'text': text, 'type': kind, 'slug': slug})
+                if len(results) >= limit:
+                    break
+        return results
+
+
+index = PrefixIndex()
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CartItem, ProductVariant, StockReservation
+
+# Tiempo que se retiene el stock desde que el comprador entra al checkout
+HOLD_TTL = timedelta(minutes=15)
+
+
+def held_quantity(exclude_cart=None):
+    # Unidades retenidas por reservas vigentes (de otros carritos si se indica
+    # exclude_cart); para anotar consultas de ProductVariant.
+    holds = StockReservation.objects.filter(expires_at__gt=timezone.now())
+    if exclude_cart is not None:
+        holds = holds.exclude(cart=exclude_cart)
+    total = (
+        holds.filter(product_variant=OuterRef('pk'))
+        .values('product_variant')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    return Coalesce(Subquery(total, output_field=IntegerField()), 0)
+
+
+def available_to_sell(variants=None, exclude_cart=None):
+    variants = ProductVariant.objects.all() if variants is None else variants
+    return variants.annotate(available=F('stock') - held_quantity(exclude_cart))
+
+
+def reserve(cart):
+    # Reemplaza las reservas del carrito por unas nuevas con el TTL completo.
+    # Devuelve las líneas que no caben en el stock disponible (con .available);
+    # si hay alguna no se reserva nada.
+    with transaction.atomic():
+        StockReservation.objects.filter(cart=cart).delete()
+        lines = list(CartItem.objects.filter(cart=cart).select_related('product_variant__product'))
+        available = dict(
+            available_to_sell(ProductVariant.objects.select_for_update(), exclude_cart=cart)
+            .filter(pk__in=[line.product_variant_id for line in lines])
+            .values_list('pk', 'available')
+        )
+        short = []
+        for line in lines:
+            line.available = max(available.get(line.product_variant_id, 0), 0)
+            if line.quantity > line.available:
+                short.append(line)
+        if short:
+            return short
+
+        expires_at = timezone.now() + HOLD_TTL
+        StockReservation.objects.bulk_create([
+            StockReservation(
+                cart=cart,
+                product_variant_id=line.product_variant_id,
+                quantity=line.quantity,
+                expires_at=expires_at,
+            )
+            for line in lines
+        ])
+    return []
+
+
+def release(cart):
+    StockReservation.objects.filter(cart=cart).delete()
+
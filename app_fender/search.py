@@ -0,0 +1,135 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from .models import Product, ProductVariant
+
+FTS_TABLE = 'app_fender_product_fts'
+
+# Pesos BM25 por columna: name, description, category, colors, model_numbers
+BM25_WEIGHTS = (10.0, 1.0, 4.0, 3.0, 8.0)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Tope de resultados por búsqueda; mantiene acotado el ORDER BY CASE de ranked()
+MAX_RESULTS = 500
+
+
+def _document(product_id):
+    product = (
+        Product.objects.select_related('category')
+        .only('name', 'description', 'category__name')
+        .filter(pk=product_id)
+        .first()
+    )
+    if product is None:
+        return None
+
+    variants = ProductVariant.objects.filter(product_id=product_id).values_list('color', 'model_number')
+    colors = ' '.join(color for color, _ in variants)
+    model_numbers = ' '.join(number for _, number in variants if number)
+    category = product.category.name if product.category else ''
+    return (product_id, product.name, product.description, category, colors, model_numbers)
+
+
+def remove_product(product_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product_id])
+
+
+def index_product(product_id):
+    document = _document(product_id)
+    remove_product(product_id)
+    if document is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description, category, colors, model_numbers) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            document,
+        )
+
+
+def rebuild_index(batch_size=1000):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    colors = {}
+    model_numbers = {}
+    variants = ProductVariant.objects.values_list('product_id', 'color', 'model_number').order_by('pk')
+    for product_id, color, number in variants.iterator(chunk_size=batch_size):
+        colors.setdefault(product_id, []).append(color)
+        if number:
+            model_numbers.setdefault(product_id, []).append(number)
+
+    rows = []
+    total = 0
+    products = Product.objects.values_list('pk', 'name', 'description', 'category__name').order_by('pk')
+    with connection.cursor() as cursor:
+        for pk, name, description, category in products.iterator(chunk_size=batch_size):
+            rows.append((
+                pk, name, description, category or '',
+                ' '.join(colors.get(pk, [])), ' '.join(model_numbers.get(pk, [])),
+            ))
+            if len(rows) >= batch_size:
+                _insert_rows(cursor, rows)
+                total += len(rows)
+                rows = []
+        if rows:
+            _insert_rows(cursor, rows)
+            total += len(rows)
+    return total
+
+
+def _insert_rows(cursor, rows):
+    cursor.executemany(
+        f'INSERT INTO {FTS_TABLE} (rowid, name, description, category, colors, model_numbers) '
+        'VALUES (%s, %s, %s, %s, %s, %s)',
+        rows,
+    )
+
+
+def match_expression(query):
+    # Cada palabra se cita para que la sintaxis de FTS5 (AND, OR, ", *) no
+    # rompa la consulta; la última se busca como prefijo.
+    tokens = TOKEN_RE.findall(query or '')
+    if not tokens:
+        return None
+    terms = ['"%s"' % token for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_product_ids(query, limit=MAX_RESULTS):
+    expression = match_expression(query)
+    if expression is None:
+        return []
+
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    sql = (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+        f'ORDER BY bm25({FTS_TABLE}, {weights})'
+    )
+    params = [expression]
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def ranked(queryset, ids):
+    if not ids:
+        return queryset.none()
+    order = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(order)
+
+
+def search_products(queryset, query, limit=MAX_RESULTS):
+    return ranked(queryset, search_product_ids(query, limit=limit))
@@ -0,0 +1,126 @@
+from functools import partial
+
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import facets, fuzzy, prefix, search, stats
+from .caching import products_changed
+from .carts import merge_session_cart
+from .models import Category, CustomUser, Order, Product, ProductVariant
+
+
+def _catalog_changed(product_ids):
+    for product_id in product_ids:
+        fuzzy.index.mark_dirty(product_id)
+        prefix.index.mark_dirty(product_id)
+        facets.index.mark_dirty(product_id)
+    products_changed(product_ids)
+
+
+def _mark_dirty(product_id):
+    # Después del commit: antes, otro worker releería los datos sin confirmar
+    transaction.on_commit(partial(_catalog_changed, [product_id]))
+
+
+@receiver(user_logged_in)
+def user_logged_in_merge_cart(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        merge_session_cart(request, user)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_product(instance.pk)
+    _mark_dirty(instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    search.remove_product(instance.pk)
+    _mark_dirty(instance.pk)
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def variant_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_product(instance.product_id)
+    _mark_dirty(instance.product_id)
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    product_ids = [] if created else list(instance.products.values_list('pk', flat=True))
+    for product_id in product_ids:
+        search.index_product(product_id)
+    transaction.on_commit(partial(_catalog_changed, product_ids))
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleting(sender, instance, **kwargs):
+    # Los productos quedan con category=NULL mediante un UPDATE sin señales
+    instance._product_ids = list(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    product_ids = getattr(instance, '_product_ids', [])
+    for product_id in product_ids:
+        search.index_product(product_id)
+    transaction.on_commit(partial(_catalog_changed, product_ids))
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductVariant)
+def counted_created(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.counter_key(sender), 1)
+
+
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductVariant)
+def counted_deleted(sender, instance, **kwargs):
+    stats.bump(stats.counter_key(sender), -1)
+
+
+@receiver(pre_save, sender=Order)
+def order_saving(sender, instance, **kwargs):
+    # Estado e importe anteriores para mover los ingresos entre contadores
+    instance._stats_previous = None
+    if instance.pk:
+        instance._stats_previous = Order.objects.filter(pk=instance.pk).values('status', 'total_amount').first()
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    day = stats.day_key(timezone.localdate(instance.created_at))
+    previous = getattr(instance, '_stats_previous', None)
+    if created or previous is None:
+        stats.bump('orders', 1)
+        stats.bump(stats.status_key(instance.status), 1, instance.total_amount)
+        stats.bump(day, 1, instance.total_amount)
+        return
+    if previous['status'] == instance.status and previous['total_amount'] == instance.total_amount:
+        return
+    stats.bump(stats.status_key(previous['status']), -1, -previous['total_amount'])
+    stats.bump(stats.status_key(instance.status), 1, instance.total_amount)
+    stats.bump(day, 0, instance.total_amount - previous['total_amount'])
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    stats.bump('orders', -1)
+    stats.bump(stats.status_key(instance.status), -1, -instance.total_amount)
+    stats.bump(stats.day_key(timezone.localdate(instance.created_at)), -1, -instance.total_amount)
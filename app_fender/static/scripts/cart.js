@@ -0,0 +1,109 @@
+// Operaciones del carrito mediante /cart/api/ sin recargar la página.
+// Si el navegador no ejecuta este script, los enlaces siguen funcionando.
+const CartApi = (() => {
+    const readCookie = (name) => {
+        const match = document.cookie.match(new RegExp(`(?:^|; )${name}=([^;]*)`));
+        return match ? decodeURIComponent(match[1]) : null;
+    };
+
+    const csrfToken = (url) => {
+        const token = readCookie('csrftoken');
+        if (token) {
+            return Promise.resolve(token);
+        }
+        // El GET de la API deja la cookie CSRF (las páginas cacheadas no la incluyen)
+        return fetch(url, {credentials: 'same-origin'}).then(() => readCookie('csrftoken'));
+    };
+
+    const send = (url, ops) => csrfToken(url).then((token) => fetch(url, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: {'Content-Type': 'application/json', 'X-CSRFToken': token},
+        body: JSON.stringify({ops}),
+    })).then((response) => {
+        if (!response.ok) {
+            throw new Error(`Cart API error ${response.status}`);
+        }
+        return response.json();
+    });
+
+    const updateBadge = (totals) => {
+        let badge = document.querySelector('.cart-badge');
+        if (!badge && totals.item_count) {
+            badge = document.createElement('span');
+            badge.className = 'cart-badge';
+            badge.style.cssText = 'background-color: #c51224; color: white; border-radius: 10px; padding: 1px 7px; font-size: 12px; font-weight: bold; vertical-align: top;';
+            document.querySelector('.cart-icon').appendChild(badge);
+        }
+        if (badge) {
+            badge.textContent = totals.item_count;
+            badge.style.display = totals.item_count ? '' : 'none';
+        }
+    };
+
+    return {send, updateBadge};
+})();
+
+document.addEventListener('DOMContentLoaded', () => {
+    // cart.html
+    const container = document.querySelector('[data-cart-api].productos-contenedor');
+    if (container) {
+        const url = container.dataset.cartApi;
+
+        const apply = (product, op, event) => {
+            event.preventDefault();
+            CartApi.send(url, [op]).then((data) => {
+                const result = data.results[0];
+                if (!result.ok) {
+                    alert(result.error);
+                    return;
+                }
+                if (result.line) {
+                    product.querySelector('.cantidad').textContent = result.line.quantity;
+                    product.querySelector('.subtotal').textContent = result.line.line_total;
+                } else {
+                    product.remove();
+                }
+                document.getElementById('cart-total').textContent = data.totals.total_price;
+                CartApi.updateBadge(data.totals);
+                if (!container.querySelector('.producto')) {
+                    container.innerHTML = '<p>Your cart is empty.</p>';
+                }
+            }).catch(() => {
+                window.location.href = event.target.href;
+            });
+        };
+
+        container.querySelectorAll('.producto').forEach((product) => {
+            const variantId = Number(product.dataset.variantId);
+            product.querySelector('.btn-add').addEventListener('click', (event) => {
+                apply(product, {op: 'add', variant_id: variantId, quantity: 1}, event);
+            });
+            product.querySelector('.btn-re').addEventListener('click', (event) => {
+                apply(product, {op: 'decrement', variant_id: variantId}, event);
+            });
+            product.querySelector('.btn-borrar').addEventListener('click', (event) => {
+                apply(product, {op: 'remove', variant_id: variantId}, event);
+            });
+        });
+    }
+
+    // buy.html
+    const buy = document.getElementById('variant-buy');
+    if (buy && buy.dataset.cartApi) {
+        buy.addEventListener('click', (event) => {
+            event.preventDefault();
+            const label = buy.textContent;
+            CartApi.send(buy.dataset.cartApi, [{op: 'add', variant_id: Number(buy.dataset.variantId), quantity: 1}])
+                .then((data) => {
+                    const result = data.results[0];
+                    buy.textContent = result.ok ? 'Added to cart ✓' : result.error;
+                    CartApi.updateBadge(data.totals);
+                    setTimeout(() => { buy.textContent = label; }, 2000);
+                })
+                .catch(() => {
+                    window.location.href = buy.href;
+                });
+        });
+    }
+});
@@ -0,0 +1,59 @@
+// Autocompletado del buscador del encabezado usando /search/suggest/
+document.addEventListener('DOMContentLoaded', () => {
+    const input = document.getElementById('search-input');
+    if (!input || !input.dataset.suggestUrl) {
+        return;
+    }
+
+    const list = document.createElement('datalist');
+    list.id = 'search-suggestions';
+    input.after(list);
+    input.setAttribute('list', list.id);
+    input.setAttribute('autocomplete', 'off');
+
+    const cache = new Map();
+    let urls = new Map();
+    let timer = null;
+
+    const render = (results) => {
+        list.innerHTML = '';
+        urls = new Map();
+        results.forEach((result) => {
+            const option = document.createElement('option');
+            option.value = result.text;
+            list.appendChild(option);
+            urls.set(result.text, result.url);
+        });
+    };
+
+    input.addEventListener('input', (event) => {
+        const prefix = input.value.trim().toLowerCase();
+        // Elegir una opción del datalist llega como insertReplacementText (sin
+        // inputType en Firefox); escribir el texto exacto no debe navegar
+        const picked = event.inputType === undefined || event.inputType === 'insertReplacementText';
+        if (picked && urls.has(input.value)) {
+            window.location.href = urls.get(input.value);
+            return;
+        }
+        clearTimeout(timer);
+        if (prefix.length < 2) {
+            render([]);
+            return;
+        }
+        if (cache.has(prefix)) {
+            render(cache.get(prefix));
+            return;
+        }
+        timer = setTimeout(() => {
+            fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(prefix)}`)
+                .then((response) => response.json())
+                .then((data) => {
+                    cache.set(prefix, data.results);
+                    if (input.value.trim().toLowerCase() === prefix) {
+                        render(data.results);
+                    }
+                })
+                .catch(() => {});
+        }, 120);
+    });
+});
@@ -0,0 +1,80 @@
+// Cambio de color en buy.html usando los datos embebidos en #variants-data,
+// sin volver a pedir la página al servidor.
+(() => {
+    const data = document.getElementById('variants-data');
+    if (!data) {
+        return;
+    }
+    const variants = new Map(JSON.parse(data.textContent).map((variant) => [String(variant.id), variant]));
+
+    const image = document.getElementById('variant-image');
+    const model = document.getElementById('variant-model');
+    const price = document.getElementById('variant-price');
+    const color = document.getElementById('variant-color');
+    const buy = document.getElementById('variant-buy');
+    const video = document.getElementById('variant-video');
+
+    const showVideo = (link) => {
+        const iframe = video.querySelector('iframe');
+        if (!link) {
+            video.style.display = 'none';
+            return;
+        }
+        video.style.display = '';
+        if (iframe) {
+            iframe.src = link;
+            return;
+        }
+        const frame = document.createElement('iframe');
+        frame.width = 560;
+        frame.height = 315;
+        frame.src = link;
+        frame.title = 'YouTube video player';
+        frame.frameBorder = 0;
+        frame.allow = 'accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share';
+        frame.referrerPolicy = 'strict-origin-when-cross-origin';
+        frame.allowFullscreen = true;
+        frame.style.cssText = 'margin-left: 10px; border-radius: 15px; margin-top: 30px; margin-bottom: 30px;';
+        video.appendChild(frame);
+    };
+
+    const select = (id) => {
+        const variant = variants.get(id);
+        if (!variant) {
+            return false;
+        }
+        image.src = variant.secondary_image || variant.image;
+        image.alt = `${image.alt.split(' - ')[0]} - ${variant.color}`;
+        model.textContent = variant.model_number;
+        price.textContent = variant.price;
+        color.textContent = variant.color;
+        buy.href = buy.dataset.urlTemplate.replace('/0/', `/${variant.id}/`);
+        buy.dataset.variantId = variant.id;
+        showVideo(variant.youtube_link);
+
+        document.querySelectorAll('.thumbnail-link').forEach((link) => {
+            link.classList.toggle('selected', link.dataset.variantId === id);
+        });
+        document.querySelectorAll('.color-names p').forEach((name) => {
+            const label = variants.get(name.dataset.variantId).color;
+            name.innerHTML = '';
+            if (name.dataset.variantId === id) {
+                const strong = document.createElement('strong');
+                strong.textContent = label;
+                name.appendChild(strong);
+            } else {
+                name.textContent = label;
+            }
+        });
+        return true;
+    };
+
+    document.querySelectorAll('.thumbnail-link').forEach((link) => {
+        link.addEventListener('click', (event) => {
+            if (select(link.dataset.variantId)) {
+                event.preventDefault();
+                history.replaceState(null, '', link.href);
+            }
+        });
+    });
+})();
@@ -0,0 +1,128 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import Category, CustomUser, Order, Product, ProductVariant, StatCounter
+from .summaries import money
+
+# Un contador por modelo, uno por estado de pedido (cantidad e ingresos) y uno
+# por día con los pedidos creados ese día. Si falta una fila se recalcula solo
+# esa clave; reconcile() las recalcula todas (comando reconcile_stats).
+MODEL_COUNTERS = {
+    'users': CustomUser,
+    'categories': Category,
+    'products': Product,
+    'variants': ProductVariant,
+    'orders': Order,
+}
+
+
+def counter_key(model):
+    for key, counted in MODEL_COUNTERS.items():
+        if counted is model:
+            return key
+    return None
+
+
+def model_count(model):
+    # Total exacto de la tabla sin COUNT(*); None si el modelo no tiene contador
+    key = counter_key(model)
+    if key is None:
+        return None
+    return _read([key])[key][0]
+
+
+def status_key(status):
+    return f'status:{status}'
+
+
+def day_key(day):
+    return f'day:{day.isoformat()}'
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _order_totals(orders):
+    totals = orders.aggregate(count=Count('pk'), amount=Sum('total_amount'))
+    return totals['count'], money(totals['amount'])
+
+
+def _compute(key):
+    if key in MODEL_COUNTERS:
+        return MODEL_COUNTERS[key].objects.count(), Decimal('0.00')
+    kind, _, value = key.partition(':')
+    if kind == 'status':
+        return _order_totals(Order.objects.filter(status=value))
+    if kind == 'day':
+        # Rango sobre el índice (created_at, id), nunca toda la tabla
+        start, end = _day_range(datetime.fromisoformat(value).date())
+        return _order_totals(Order.objects.filter(created_at__gte=start, created_at__lt=end))
+    raise ValueError(f'Unknown stat "{key}".')
+
+
+def _store(key):
+    count, amount = _compute(key)
+    StatCounter.objects.update_or_create(key=key, defaults={'count': count, 'amount': amount})
+    return count, amount
+
+
+def bump(key, count=0, amount=0):
+    # Se llama dentro de la misma transacción que el cambio que se cuenta
+    with transaction.atomic():
+        updated = StatCounter.objects.filter(key=key).update(
+            count=F('count') + count, amount=F('amount') + amount, updated_at=timezone.now()
+        )
+        if not updated:
+            # Contador nuevo: el recálculo ya incluye el cambio actual
+            _store(key)
+
+
+def reconcile():
+    keys = list(MODEL_COUNTERS)
+    keys += [status_key(status) for status, _ in Order.STATUS_CHOICES]
+    keys += [day_key(day) for day in _week_days()]
+    with transaction.atomic():
+        for key in keys:
+            _store(key)
+    return keys
+
+
+def _week_days():
+    today = timezone.localdate()
+    monday = today - timedelta(days=today.weekday())
+    return [monday + timedelta(days=offset) for offset in range((today - monday).days + 1)]
+
+
+def _read(keys):
+    values = {row.key: (row.count, row.amount) for row in StatCounter.objects.filter(key__in=keys)}
+    for key in keys:
+        if key not in values:
+            values[key] = _store(key)
+    return values
+
+
+def dashboard():
+    # Una sola consulta sobre StatCounter (más el recálculo de claves que falten)
+    days = _week_days()
+    statuses = Order.STATUS_CHOICES
+    values = _read(
+        list(MODEL_COUNTERS)
+        + [status_key(status) for status, _ in statuses]
+        + [day_key(day) for day in days]
+    )
+    week = [values[day_key(day)] for day in days]
+    return {
+        'totals': {key: values[key][0] for key in MODEL_COUNTERS},
+        'revenue_by_status': [
+            {'status': label, 'orders': values[status_key(status)][0], 'revenue': money(values[status_key(status)][1])}
+            for status, label in statuses
+        ],
+        'today': {'orders': week[-1][0], 'revenue': money(week[-1][1])},
+        'week': {'orders': sum(count for count, _ in week), 'revenue': money(sum(amount for _, amount in week))},
+    }
@@ -0,0 +1,109 @@
+from functools import partial
+
+from django.db import transaction
+
+from .caching import products_changed
+from .catalog_import import parse_price
+from .models import ProductVariant
+
+# Filas por UPDATE ... CASE WHEN (y por consulta de lectura)
+BATCH_SIZE = 500
+MAX_RECORDS = 10000
+
+
+def _clean(record):
+    # Devuelve (model_number, stock o None, precio o None) o lanza ValueError
+    if not isinstance(record, dict):
+        raise ValueError('Each record must be an object.')
+    model_number = str(record.get('model_number') or '').strip()
+    if not model_number:
+        raise ValueError('"model_number" is required.')
+
+    stock = record.get('stock')
+    if stock not in (None, ''):
+        try:
+            stock = int(str(stock).strip())
+        except ValueError:
+            raise ValueError('"stock" must be a whole number.')
+        if stock < 0:
+            raise ValueError('"stock" cannot be negative.')
+    else:
+        stock = None
+
+    price = record.get('price')
+    if price not in (None, ''):
+        price = parse_price(price)
+    else:
+        price = None
+
+    if stock is None and price is None:
+        raise ValueError('Send "stock", "price" or both.')
+    return model_number, stock, price
+
+
+def apply_updates(records):
+    # Lectura por lotes, bulk_update (UPDATE ... CASE WHEN por lote) solo de las
+    # variantes que cambian, todo en una transacción. Las cachés se invalidan
+    # al confirmar y únicamente para los productos modificados.
+    results = [None] * len(records)
+    wanted = {}
+    for position, record in enumerate(records):
+        try:
+            model_number, stock, price = _clean(record)
+        except ValueError as error:
+            results[position] = {
+                'model_number': record.get('model_number') if isinstance(record, dict) else None,
+                'status': 'invalid',
+                'error': str(error),
+            }
+            continue
+        # Si un SKU se repite gana el último registro
+        wanted[model_number] = (position, stock, price)
+        results[position] = {'model_number': model_number, 'status': 'duplicate', 'error': 'Superseded by a later record.'}
+
+    changed_products = set()
+    with transaction.atomic():
+        numbers = list(wanted)
+        variants = {}
+        for start in range(0, len(numbers), BATCH_SIZE):
+            for variant in ProductVariant.objects.filter(model_number__in=numbers[start:start + BATCH_SIZE]).only(
+                'id', 'product_id', 'model_number', 'stock', 'price'
+            ):
+                variants[variant.model_number] = variant
+
+        dirty = []
+        for model_number, (position, stock, price) in wanted.items():
+            variant = variants.get(model_number)
+            if variant is None:
+                results[position] = {'model_number': model_number, 'status': 'not_found', 'error': 'Unknown model number.'}
+                continue
+            changed = False
+            if stock is not None and stock != variant.stock:
+                variant.stock = stock
+                changed = True
+            if price is not None and price != variant.price:
+                variant.price = price
+                changed = True
+            if changed:
+                dirty.append(variant)
+                changed_products.add(variant.product_id)
+            results[position] = {
+                'model_number': model_number,
+                'status': 'updated' if changed else 'unchanged',
+                'error': None,
+                'stock': variant.stock,
+                'price': str(variant.price),
+            }
+
+        ProductVariant.objects.bulk_update(dirty, ['stock', 'price'], batch_size=BATCH_SIZE)
+        if changed_products:
+            # bulk_update no envía señales; también corre desde sync_stock
+            transaction.on_commit(partial(products_changed, changed_products))
+    return results
+
+
+def summarize(results):
+    totals = {}
+    for result in results:
+        totals[result['status']] = totals.get(result['status'], 0) + 1
+    return totals
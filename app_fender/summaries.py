@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Window
+from django.db.models.functions import Coalesce
+
+from .models import CartItem, OrderItem
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+CENT = Decimal('0.01')
+
+CART_LINE_TOTAL = ExpressionWrapper(F('quantity') * F('product_variant__price'), output_field=MONEY)
+ORDER_LINE_TOTAL = ExpressionWrapper(F('quantity') * F('price'), output_field=MONEY)
+
+
+def money(value):
+    # SQLite devuelve las expresiones decimales sin escala (100 en vez de 100.00)
+    return Decimal(value or 0).quantize(CENT)
+
+
+class Summary:
+    def __init__(self, lines, item_count=0, total_price=Decimal('0.00')):
+        self.lines = lines
+        self.item_count = item_count
+        self.total_price = total_price
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+
+def _summarize(queryset, line_total):
+    # Una sola consulta: cada línea trae su subtotal y, mediante funciones
+    # de ventana, el número de artículos y el total de todo el conjunto.
+    lines = list(
+        queryset.select_related('product_variant__product').annotate(
+            line_total=line_total,
+            summary_count=Window(Sum('quantity')),
+            summary_total=Window(Sum(line_total), output_field=MONEY),
+        ).order_by('pk')
+    )
+    if not lines:
+        return Summary([])
+    for line in lines:
+        line.line_total = money(line.line_total)
+    return Summary(lines, lines[0].summary_count, money(lines[0].summary_total))
+
+
+def cart_summary(cart):
+    return _summarize(CartItem.objects.filter(cart=cart), CART_LINE_TOTAL)
+
+
+def order_summary(order):
+    return _summarize(OrderItem.objects.filter(order=order), ORDER_LINE_TOTAL)
+
+
+def session_summary(lines):
+    # Las líneas del carrito anónimo ya vienen de una sola consulta (carts.py)
+    return Summary(
+        lines,
+        sum(line.quantity for line in lines),
+        sum((line.line_total for line in lines), Decimal('0.00')),
+    )
+
+
+def carts_with_totals(queryset):
+    return queryset.annotate(
+        total_price=Coalesce(
+            Sum(F('items__quantity') * F('items__product_variant__price'), output_field=MONEY),
+            Decimal('0.00'),
+            output_field=MONEY,
+        ),
+    )
@@ -0,0 +1,117 @@
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Order, Task
+
+# Tiempo que un worker puede tener una tarea antes de que otro la recoja
+VISIBILITY_TIMEOUT = timedelta(minutes=5)
+# Reintentos: 30 s, 1 min, 2 min, ... hasta 1 hora
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+
+HANDLERS = {}
+
+
+def task(name):
+    def register(function):
+        HANDLERS[name] = function
+        return function
+    return register
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=5):
+    # Dentro de transaction.atomic() la tarea se guarda junto con el resto de
+    # cambios: si la transacción falla, la tarea tampoco existe.
+    if name not in HANDLERS:
+        raise ValueError(f'Unknown task "{name}".')
+    return Task.objects.create(
+        name=name,
+        payload=payload or {},
+        max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit, visibility_timeout=VISIBILITY_TIMEOUT):
+    # Toma hasta `limit` tareas listas: pendientes cuyo run_at ya pasó o en
+    # ejecución cuyo worker dejó vencer locked_until (se cayó o se colgó).
+    now = timezone.now()
+    ready = Q(status=Task.PENDING, run_at__lte=now) | Q(status=Task.RUNNING, locked_until__lt=now)
+    with transaction.atomic():
+        pks = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(ready)
+            .order_by('run_at', 'pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if not pks:
+            return []
+        Task.objects.filter(ready, pk__in=pks).update(
+            status=Task.RUNNING,
+            locked_by=worker,
+            locked_until=now + visibility_timeout,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        return list(Task.objects.filter(pk__in=pks, status=Task.RUNNING, locked_by=worker))
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def _finish(item, **fields):
+    # Solo si la tarea sigue siendo de este worker (no venció su visibilidad)
+    Task.objects.filter(pk=item.pk, locked_by=item.locked_by, attempts=item.attempts).update(
+        locked_by='', locked_until=None, updated_at=timezone.now(), **fields
+    )
+
+
+def run(item):
+    if item.attempts > item.max_attempts:
+        _finish(item, status=Task.FAILED, last_error='Visibility timeout exceeded on the last attempt.')
+        return False
+    handler = HANDLERS.get(item.name)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for task "{item.name}".')
+        handler(**item.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if item.attempts >= item.max_attempts:
+            _finish(item, status=Task.FAILED, last_error=error)
+        else:
+            _finish(item, status=Task.PENDING, last_error=error,
+                    run_at=timezone.now() + backoff(item.attempts))
+        return False
+    _finish(item, status=Task.DONE, last_error='')
+    return True
+
+
+@task('send_order_confirmation')
+def send_order_confirmation(order_id):
+    order = Order.objects.select_related('user').filter(pk=order_id).first()
+    if order is None or order.user is None:
+        return
+    lines = '\n'.join(
+        f'{item.quantity} x {item.product_variant} - ${item.price} USD'
+        for item in order.items.select_related('product_variant__product')
+    )
+    send_mail(
+        f'Your Fender order #{order.pk}',
+        f'Hi {order.user.first_name},\n\nThanks for your order.\n\n{lines}\n\n'
+        f'Total: ${order.total_amount} USD\n',
+        None,
+        [order.user.email],
+    )
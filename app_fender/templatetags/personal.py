@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from app_fender.personalization import FRAGMENTS, placeholder
+
+register = template.Library()
+
+
+@register.simple_tag
+def personal(name):
+    # Deja un hueco que PersonalizationMiddleware rellena por usuario, así la
+    # página que lo contiene puede compartirse desde la caché.
+    if name not in FRAGMENTS:
+        raise template.TemplateSyntaxError(f'Unknown personal fragment: {name}')
+    return mark_safe(placeholder(name))
@@ -1,3 +1,609 @@
+import base64
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .caching import catalog_changes_since, product_version
+from .carts import add_item, decrement_item, set_item_quantity
+from .catalog_import import CatalogImporter
+from .checkout import OutOfStock, place_order
+from .facets import FacetIndex
+from .models import (Cart, CartItem, Category, CustomUser, Order, OrderItem, Product, ProductVariant,
+                     StatCounter, StockReservation, Task)
+from .pagination import keyset_page
+from .reservations import reserve
+from . import stats, stock_sync, tasks
+
+
+class AdminPanelQueryBudgetTests(TestCase):
+    # Cada página del panel tiene un número fijo de consultas, sin importar
+    # cuántas filas muestre (sesión + usuario + consultas de la vista).
+    BUDGETS = {
+        'admin_panel': 3,
+        'admin_user_list': 3,
+        'admin_category_list': 3,
+        'admin_category_view': 4,
+        'admin_product_list': 4,
+        'admin_product_view': 4,
+        'admin_variant_list': 3,
+        'admin_variant_view': 3,
+        'admin_order_list': 3,
+        'admin_order_detail': 4,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser('admin@fender.com', 'pw', first_name='Ad', last_name='Min')
+        for number in range(3):
+            CustomUser.objects.create_user(f'user{number}@fender.com', 'pw', first_name='U', last_name=str(number))
+
+        for number in range(3):
+            category = Category.objects.create(name=f'Category {number}')
+            for index in range(4):
+                product = Product.objects.create(name=f'Guitar {number}-{index}', category=category)
+                for color in ('Red', 'Blue', 'Black'):
+                    ProductVariant.objects.create(
+                        product=product,
+                        color=color,
+                        model_number=f'{number}-{index}-{color}',
+                        price=Decimal('999.99'),
+                        image='products/guitar.png',
+                        stock=2,
+                    )
+        cls.category = category
+        cls.product = product
+
+        variants = list(ProductVariant.objects.all()[:4])
+        for _ in range(3):
+            order = Order.objects.create(
+                user=cls.admin,
+                total_amount=Decimal('3999.96'),
+                shipping_full_name='Ad Min',
+                shipping_address_line1='1 Main St',
+                shipping_city='Corona',
+                shipping_state='CA',
+                shipping_postal_code='92882',
+                shipping_country='US',
+                shipping_phone='555',
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_variant=variant, quantity=1, price=variant.price)
+                for variant in variants
+            ])
+        cls.order = order
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def url(self, name):
+        arguments = {
+            'admin_category_view': [self.category.id],
+            'admin_product_view': [self.product.id],
+            'admin_variant_view': [self.product.variants.first().id],
+            'admin_order_detail': [self.order.id],
+        }
+        return reverse(f'app_fender:{name}', args=arguments.get(name, []))
+
+    def test_pages_stay_within_query_budget(self):
+        for name, budget in self.BUDGETS.items():
+            with self.subTest(page=name):
+                url = self.url(name)
+                # La primera carga puede crear contadores del panel (stats.py)
+                self.assertEqual(self.client.get(url).status_code, 200)
+                with self.assertNumQueries(budget):
+                    self.client.get(url)
+
+    def test_list_annotations(self):
+        response = self.client.get(self.url('admin_category_list'))
+        self.assertEqual([category.product_count for category in response.context['categories']], [4, 4, 4])
+
+        response = self.client.get(self.url('admin_order_list'))
+        self.assertEqual({order.item_count for order in response.context['orders']}, {4})
+
+        response = self.client.get(self.url('admin_category_view'))
+        product = response.context['products'][0]
+        self.assertEqual((product.variant_count, product.total_stock), (3, 6))
+
+
+def shipping_order(user):
+    return Order(
+        user=user,
+        shipping_full_name='Ad Min',
+        shipping_address_line1='1 Main St',
+        shipping_city='Corona',
+        shipping_state='CA',
+        shipping_postal_code='92882',
+        shipping_country='US',
+        shipping_phone='555',
+    )
+
+
+class CheckoutStockTests(TestCase):
+    # place_order descuenta el stock con un solo UPDATE condicional: nunca
+    # vende unidades que no existen y, si una línea no cabe, no toca ninguna.
+
+    @classmethod
+    def setUpTestData(cls):
+        product = Product.objects.create(name='Player Stratocaster')
+        cls.variant = ProductVariant.objects.create(
+            product=product, color='Red', model_number='STRAT-RED', price=Decimal('799.99'),
+            image='products/strat.png', stock=2,
+        )
+        cls.other = ProductVariant.objects.create(
+            product=product, color='Blue', model_number='STRAT-BLUE', price=Decimal('799.99'),
+            image='products/strat.png', stock=5,
+        )
+        cls.buyers = [
+            CustomUser.objects.create_user(f'buyer{number}@fender.com', 'pw', first_name='B', last_name=str(number))
+            for number in range(2)
+        ]
+
+    def cart(self, user, *lines):
+        cart = Cart.objects.create(user=user)
+        for variant, quantity in lines:
+            CartItem.objects.create(cart=cart, product_variant=variant, quantity=quantity)
+        return cart
+
+    def test_last_units_are_sold_once(self):
+        first = self.cart(self.buyers[0], (self.variant, 2))
+        second = self.cart(self.buyers[1], (self.variant, 1))
+
+        order = place_order(first, shipping_order(self.buyers[0]))
+        self.assertEqual(order.total_amount, Decimal('1599.98'))
+        with self.assertRaises(OutOfStock) as raised:
+            place_order(second, shipping_order(self.buyers[1]))
+
+        shortages = [(line.product_variant_id, line.available) for line in raised.exception.lines]
+        self.assertEqual(shortages, [(self.variant.id, 0)])
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock, 0)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(second.items.count(), 1)
+
+    def test_short_line_rolls_back_the_whole_cart(self):
+        cart = self.cart(self.buyers[0], (self.other, 3), (self.variant, 3))
+
+        with self.assertRaises(OutOfStock) as raised:
+            place_order(cart, shipping_order(self.buyers[0]))
+
+        self.assertEqual([line.product_variant_id for line in raised.exception.lines], [self.variant.id])
+        self.assertEqual(
+            dict(ProductVariant.objects.values_list('model_number', 'stock')), {'STRAT-RED': 2, 'STRAT-BLUE': 5}
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_sale_publishes_changed_products(self):
+        cart = self.cart(self.buyers[0], (self.variant, 1))
+        generation, _ = catalog_changes_since(None)
+        version = product_version(self.variant.product_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(cart, shipping_order(self.buyers[0]))
+
+        self.assertEqual(catalog_changes_since(generation)[1], {self.variant.product_id})
+        self.assertNotEqual(product_version(self.variant.product_id), version)
+
+    def test_hold_keeps_units_for_its_cart(self):
+        holder = self.cart(self.buyers[0], (self.variant, 2))
+        other = self.cart(self.buyers[1], (self.variant, 1))
+
+        self.assertEqual(reserve(holder), [])
+        self.assertEqual([line.available for line in reserve(other)], [0])
+        with self.assertRaises(OutOfStock):
+            place_order(other, shipping_order(self.buyers[1]))
+
+        place_order(holder, shipping_order(self.buyers[0]))
+        self.assertFalse(StockReservation.objects.filter(cart=holder).exists())
+
+    def test_expired_hold_stops_counting(self):
+        holder = self.cart(self.buyers[0], (self.variant, 2))
+        other = self.cart(self.buyers[1], (self.variant, 1))
+        reserve(holder)
+        StockReservation.objects.filter(cart=holder).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(reserve(other), [])
+        place_order(other, shipping_order(self.buyers[1]))
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock, 1)
+
+    def test_replayed_key_returns_the_same_order(self):
+        cart = self.cart(self.buyers[0], (self.variant, 1))
+
+        order = place_order(cart, shipping_order(self.buyers[0]), key='checkout-1')
+        # El carrito ya está vacío: la repetición no debe llegar a descontar stock
+        replayed = place_order(cart, shipping_order(self.buyers[0]), key='checkout-1')
+
+        self.assertEqual(replayed.pk, order.pk)
+        self.assertEqual(Order.objects.count(), 1)
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock, 1)
+
+    def test_resubmitted_checkout_form_redirects_to_the_first_order(self):
+        self.cart(self.buyers[0], (self.variant, 1))
+        self.client.force_login(self.buyers[0])
+        data = {
+            'shipping_full_name': 'B 0',
+            'shipping_address_line1': '1 Main St',
+            'shipping_city': 'Corona',
+            'shipping_state': 'CA',
+            'shipping_postal_code': '92882',
+            'shipping_country': 'US',
+            'shipping_phone': '555',
+            'idempotency_key': 'form-1',
+        }
+
+        first = self.client.post(reverse('app_fender:checkout'), data)
+        second = self.client.post(reverse('app_fender:checkout'), data)
+
+        confirmation = reverse('app_fender:order_confirmation', args=[Order.objects.get().id])
+        self.assertRedirects(first, confirmation, fetch_redirect_response=False)
+        self.assertRedirects(second, confirmation, fetch_redirect_response=False)
+
+
+class CartUpsertTests(TestCase):
+    # Las operaciones del carrito son sentencias atómicas que respetan el stock
+
+    @classmethod
+    def setUpTestData(cls):
+        product = Product.objects.create(name='Precision Bass')
+        cls.variant = ProductVariant.objects.create(
+            product=product, color='Sunburst', model_number='PB-SB', price=Decimal('1299.00'),
+            image='products/pbass.png', stock=3,
+        )
+        cls.user = CustomUser.objects.create_user('bass@fender.com', 'pw', first_name='P', last_name='B')
+
+    def setUp(self):
+        self.cart = Cart.objects.create(user=self.user)
+
+    def quantity(self):
+        items = CartItem.objects.filter(cart=self.cart, product_variant=self.variant)
+        return items.values_list('quantity', flat=True).first()
+
+    def test_add_stops_at_stock(self):
+        self.assertTrue(add_item(self.cart, self.variant.id, 2))
+        self.assertTrue(add_item(self.cart, self.variant.id, 1))
+        self.assertFalse(add_item(self.cart, self.variant.id, 1))
+        self.assertEqual(self.quantity(), 3)
+
+    def test_first_add_above_stock_creates_nothing(self):
+        self.assertFalse(add_item(self.cart, self.variant.id, 4))
+        self.assertIsNone(self.quantity())
+
+    def test_set_quantity_respects_stock(self):
+        add_item(self.cart, self.variant.id, 1)
+        self.assertFalse(set_item_quantity(self.cart, self.variant.id, 4))
+        self.assertTrue(set_item_quantity(self.cart, self.variant.id, 3))
+        self.assertEqual(self.quantity(), 3)
+
+    def test_decrement_removes_the_line_only_at_one(self):
+        add_item(self.cart, self.variant.id, 2)
+        item = CartItem.objects.get(cart=self.cart)
+
+        self.assertTrue(decrement_item(self.cart, item.id))
+        self.assertEqual(self.quantity(), 1)
+        self.assertTrue(decrement_item(self.cart, item.id))
+        self.assertIsNone(self.quantity())
+        self.assertFalse(decrement_item(self.cart, item.id))
+
+
+class KeysetPaginationTests(TestCase):
+    # Cursores sobre (name, id): nombres repetidos no duplican ni saltan filas
+
+    @classmethod
+    def setUpTestData(cls):
+        names = ['Jazzmaster', 'Telecaster', 'Jazzmaster', 'Mustang', 'Telecaster', 'Jaguar', 'Jazzmaster']
+        for number, name in enumerate(names):
+            Product.objects.create(name=name, slug=f'product-{number}')
+        cls.expected = list(Product.objects.order_by('name', 'id').values_list('id', flat=True))
+
+    def walk(self, per_page):
+        pages = []
+        page = keyset_page(Product.objects.all(), ['name', 'id'], None, per_page)
+        pages.append([product.id for product in page])
+        while page.has_next:
+            page = keyset_page(Product.objects.all(), ['name', 'id'], page.next_cursor, per_page)
+            pages.append([product.id for product in page])
+        return pages, page
+
+    def test_forward_walk_visits_every_row_once(self):
+        for per_page in (1, 2, 3, 7):
+            with self.subTest(per_page=per_page):
+                pages, _ = self.walk(per_page)
+                self.assertEqual([pk for page in pages for pk in page], self.expected)
+
+    def test_previous_cursor_returns_the_same_page(self):
+        pages, last = self.walk(2)
+        page = last
+        for expected in reversed(pages[:-1]):
+            page = keyset_page(Product.objects.all(), ['name', 'id'], page.prev_cursor, 2)
+            self.assertEqual([product.id for product in page], expected)
+        self.assertFalse(page.has_previous)
+
+    def test_cursor_is_stable_when_rows_are_added_before_it(self):
+        first = keyset_page(Product.objects.all(), ['name', 'id'], None, 3)
+        Product.objects.create(name='Bass VI', slug='bass-vi')
+        second = keyset_page(Product.objects.all(), ['name', 'id'], first.next_cursor, 3)
+        self.assertEqual([product.id for product in second], self.expected[3:6])
+
+    def test_tampered_cursor_starts_over(self):
+        page = keyset_page(Product.objects.all(), ['name', 'id'], 'not-a-cursor', 3)
+        self.assertEqual([product.id for product in page], self.expected[:3])
+
+
+class CatalogImportTests(TestCase):
+    # Las filas inválidas se informan con su línea y el resto del lote se importa
+
+    def row(self, **values):
+        row = {
+            'category': 'Electric Guitars',
+            'product': 'American Professional II Stratocaster',
+            'color': 'Olympic White',
+            'model_number': '0113900705',
+            'price': '1699.99',
+            'stock': '4',
+            'image': 'products/strat.png',
+        }
+        row.update(values)
+        return row
+
+    def test_bad_rows_do_not_abort_the_batch(self):
+        rows = [
+            (2, self.row()),
+            (3, self.row(model_number='BAD-PRICE', color='Red', price='NaN')),
+            (4, self.row(model_number='BAD-INF', color='Blue', price='Infinity')),
+            (5, self.row(model_number='BAD-STOCK', color='Green', stock='-1')),
+            (6, self.row(model_number='NO-PRODUCT', product='')),
+            (7, self.row(model_number='0113900706', color='Black', price='1749.99')),
+        ]
+
+        importer = CatalogImporter(batch_size=4).run(rows)
+
+        self.assertEqual([line for line, _ in importer.errors], [3, 4, 5, 6])
+        self.assertEqual(
+            dict(ProductVariant.objects.values_list('model_number', 'price')),
+            {'0113900705': Decimal('1699.99'), '0113900706': Decimal('1749.99')},
+        )
+        self.assertEqual(Product.objects.get().category.name, 'Electric Guitars')
+
+    def test_reimport_updates_by_model_number(self):
+        CatalogImporter().run([(2, self.row())])
+        importer = CatalogImporter().run([(2, self.row(price='1599.99', stock='0'))])
+
+        self.assertEqual((importer.created, importer.updated), (0, 1))
+        variant = ProductVariant.objects.get()
+        self.assertEqual((variant.price, variant.stock), (Decimal('1599.99'), 0))
+
+
+class StockSyncTests(TestCase):
+    # Los registros inválidos se marcan uno a uno sin tumbar el lote
+
+    @classmethod
+    def setUpTestData(cls):
+        product = Product.objects.create(name='Deluxe Reverb')
+        for number in range(3):
+            ProductVariant.objects.create(
+                product=product, color=f'Color {number}', model_number=f'DR-{number}', price=Decimal('1499.99'),
+                image='products/deluxe.png', stock=1,
+            )
+        cls.staff = CustomUser.objects.create_user(
+            'warehouse@fender.com', 'pw', first_name='W', last_name='H', is_staff=True
+        )
+        cls.customer = CustomUser.objects.create_user('customer@fender.com', 'pw', first_name='C', last_name='U')
+
+    def test_bad_records_do_not_abort_the_batch(self):
+        results = stock_sync.apply_updates([
+            {'model_number': 'DR-0', 'stock': 7},
+            {'model_number': 'DR-1', 'price': 'NaN'},
+            {'model_number': 'DR-1', 'price': '-Infinity'},
+            {'model_number': 'DR-2', 'stock': -1},
+            {'model_number': 'UNKNOWN', 'stock': 1},
+            {'stock': 3},
+            {'model_number': 'DR-2', 'price': '1399.99'},
+        ])
+
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['updated', 'invalid', 'invalid', 'invalid', 'not_found', 'invalid', 'updated'],
+        )
+        self.assertEqual(
+            list(ProductVariant.objects.order_by('model_number').values_list('stock', 'price')),
+            [(7, Decimal('1499.99')), (1, Decimal('1499.99')), (1, Decimal('1399.99'))],
+        )
+
+    def post(self, user=None, password='pw'):
+        headers = {}
+        if user:
+            credentials = base64.b64encode(f'{user.email}:{password}'.encode()).decode()
+            headers['HTTP_AUTHORIZATION'] = f'Basic {credentials}'
+        body = json.dumps({'records': [{'model_number': 'DR-0', 'stock': 5}]})
+        url = reverse('app_fender:admin_stock_sync')
+        return self.client.post(url, body, content_type='application/json', **headers)
+
+    def test_endpoint_uses_basic_auth(self):
+        self.assertEqual(self.post().status_code, 401)
+        self.assertEqual(self.post(self.staff, 'wrong').status_code, 401)
+        self.assertEqual(self.post(self.customer).status_code, 403)
+
+        response = self.post(self.staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totals'], {'updated': 1})
+
+
+class FacetIndexTests(TestCase):
+    # Un producto coincide solo si una misma variante cumple todas las facetas
+
+    @classmethod
+    def setUpTestData(cls):
+        electric = Category.objects.create(name='Electric Guitars')
+        bass = Category.objects.create(name='Basses')
+        cls.strat = Product.objects.create(name='Stratocaster', category=electric)
+        cls.tele = Product.objects.create(name='Telecaster', category=electric)
+        cls.jazz = Product.objects.create(name='Jazzmaster', category=electric)
+        cls.precision = Product.objects.create(name='Precision Bass', category=bass)
+        for product, color, price, stock in [
+            (cls.strat, 'Red', '300', 1),
+            (cls.strat, 'Blue', '3000', 0),
+            (cls.tele, 'Red', '3000', 2),
+            (cls.precision, 'Blue', '300', 3),
+        ]:
+            ProductVariant.objects.create(
+                product=product, color=color, model_number=f'{product.slug}-{color}', price=Decimal(price),
+                image='products/guitar.png', stock=stock,
+            )
+
+    def setUp(self):
+        self.index = FacetIndex()
+
+    def matches(self, **selected):
+        product_ids, _ = self.index.search(selected)
+        return set(product_ids)
+
+    def counts(self, name, **selected):
+        _, facets = self.index.search(selected)
+        values = next(facet['values'] for facet in facets if facet['name'] == name)
+        return {value['value']: value['count'] for value in values}
+
+    def test_facets_must_match_the_same_variant(self):
+        self.assertEqual(self.matches(color={'red'}, price={'250-500'}), {self.strat.pk})
+        self.assertEqual(self.matches(color={'blue'}, price={'250-500'}), {self.precision.pk})
+        self.assertEqual(self.matches(color={'blue'}, in_stock={'1'}), {self.precision.pk})
+        self.assertEqual(self.matches(color={'red'}, price={'2000+'}), {self.tele.pk})
+
+    def test_counts_ignore_their_own_selection(self):
+        self.assertEqual(self.counts('color', color={'red'}), {'red': 2, 'blue': 2})
+        self.assertEqual(self.counts('price', color={'red'}), {'250-500': 1, '2000+': 1})
+        self.assertEqual(self.counts('categories', color={'blue'}), {'electric-guitars': 1, 'basses': 1})
+
+    def test_product_without_variants_only_has_its_category(self):
+        self.assertIn(self.jazz.pk, self.matches(categories={'electric-guitars'}))
+        self.assertEqual(self.counts('categories'), {'electric-guitars': 3, 'basses': 1})
+        self.assertNotIn(self.jazz.pk, self.matches(color={'red', 'blue'}))
+
+    def test_changed_product_is_cleared_and_set_again(self):
+        self.index.refresh()
+        ProductVariant.objects.filter(product=self.strat, color='Red').update(price=Decimal('3000'))
+        self.index.mark_dirty(self.strat.pk)
+
+        self.assertEqual(self.matches(color={'red'}, price={'2000+'}), {self.strat.pk, self.tele.pk})
+        self.assertEqual(self.matches(price={'250-500'}), {self.precision.pk})
+        self.assertEqual(self.counts('categories'), {'electric-guitars': 3, 'basses': 1})
+        # El tramo viejo queda vacío hasta la compactación
+        self.assertEqual(self.index.dead, 2)
+
+
+class TaskQueueTests(TestCase):
+    # claim() reparte cada tarea a un solo worker; los fallos vuelven a la cola
+    # con espera creciente y una tarea abandonada se recoge al vencer locked_until
+
+    def create(self, **fields):
+        # Sin handler registrado: run() siempre falla
+        fields.setdefault('run_at', timezone.now())
+        return Task.objects.create(name='missing_handler', **fields)
+
+    def test_claim_takes_only_ready_tasks_once(self):
+        ready = self.create()
+        self.create(run_at=timezone.now() + timedelta(minutes=1))
+        self.create(status=Task.DONE)
+
+        claimed = tasks.claim('worker-1', 10)
+
+        self.assertEqual([item.pk for item in claimed], [ready.pk])
+        item = claimed[0]
+        self.assertEqual((item.status, item.locked_by, item.attempts), (Task.RUNNING, 'worker-1', 1))
+        self.assertEqual(tasks.claim('worker-2', 10), [])
+
+    def test_failed_task_is_retried_with_backoff(self):
+        self.create(max_attempts=2)
+
+        for attempt, delay in [(1, tasks.BACKOFF_BASE), (2, None)]:
+            Task.objects.update(run_at=timezone.now())
+            item, = tasks.claim('worker-1', 1)
+            before = timezone.now()
+            self.assertFalse(tasks.run(item))
+            item.refresh_from_db()
+            self.assertEqual(item.attempts, attempt)
+            self.assertIn('No handler registered', item.last_error)
+            if delay is None:
+                self.assertEqual(item.status, Task.FAILED)
+            else:
+                self.assertEqual((item.status, item.locked_by), (Task.PENDING, ''))
+                self.assertTrue(before + delay <= item.run_at <= timezone.now() + delay)
+
+        self.assertEqual(tasks.backoff(2), 2 * tasks.BACKOFF_BASE)
+        self.assertEqual(tasks.backoff(20), tasks.BACKOFF_MAX)
+
+    def test_expired_lock_is_claimed_by_another_worker(self):
+        self.create()
+        stale, = tasks.claim('worker-1', 1)
+        self.assertEqual(tasks.claim('worker-2', 1), [])
+
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        item, = tasks.claim('worker-2', 1)
+        self.assertEqual((item.locked_by, item.attempts), ('worker-2', 2))
+
+        # El worker anterior ya no puede cerrar la tarea
+        tasks.run(stale)
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.locked_by), (Task.RUNNING, 'worker-2'))
+
+
+class StatCounterTests(TestCase):
+    # Los contadores del panel siguen a las señales y una fila que falta se
+    # recalcula desde la tabla
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('stats@fender.com', 'pw', first_name='S', last_name='T')
+
+    def counter(self, key):
+        row = StatCounter.objects.filter(key=key).first()
+        return (row.count, row.amount) if row else None
+
+    def order(self, amount):
+        order = shipping_order(self.user)
+        order.total_amount = Decimal(amount)
+        order.save()
+        return order
+
+    def test_bump_counts_changes_and_rebuilds_missing_rows(self):
+        Product.objects.create(name='Mustang')
+        product = Product.objects.create(name='Duo-Sonic')
+        self.assertEqual(stats.model_count(Product), 2)
+
+        product.delete()
+        self.assertEqual(stats.model_count(Product), 1)
+
+        StatCounter.objects.filter(key='products').delete()
+        stats.bump('products', 1)
+        # Sin fila el recálculo ya incluye el cambio: no se suma dos veces
+        self.assertEqual(stats.model_count(Product), 1)
+
+    def test_status_change_moves_revenue(self):
+        order = self.order('250.00')
+        self.assertEqual(self.counter(stats.status_key('pending')), (1, Decimal('250.00')))
+
+        order.status = 'paid'
+        order.total_amount = Decimal('200.00')
+        order.save()
+
+        self.assertEqual(self.counter(stats.status_key('pending')), (0, Decimal('0.00')))
+        self.assertEqual(self.counter(stats.status_key('paid')), (1, Decimal('200.00')))
+        self.assertEqual(self.counter(stats.day_key(timezone.localdate())), (1, Decimal('200.00')))
+
+    def test_day_key_counts_orders_by_local_date(self):
+        self.assertEqual(stats.day_key(date(2026, 1, 2)), 'day:2026-01-02')
+
+        order = self.order('99.99')
+        self.assertEqual(stats.dashboard()['today'], {'orders': 1, 'revenue': Decimal('99.99')})
 
-# Create your tests here.
+        # Pedido movido a ayer y contadores diarios perdidos: se recalculan por rango
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Order.objects.filter(pk=order.pk).update(created_at=order.created_at - timedelta(days=1))
+        StatCounter.objects.filter(key__startswith='day:').delete()
+        self.assertEqual(stats.dashboard()['today'], {'orders': 0, 'revenue': Decimal('0.00')})
+        stats.bump(stats.day_key(yesterday))
+        self.assertEqual(self.counter(stats.day_key(yesterday)), (1, Decimal('99.99')))
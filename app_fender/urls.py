@@ -2,6 +2,7 @@ from django.urls import path
 from django.contrib.auth import views as auth_views
 from django.views.generic import TemplateView
 from . import views
+from .caching import anonymous_page_cache
 
 app_name = 'app_fender'
 
@@ -11,9 +12,10 @@ urlpatterns = [
     path('categories/', views.category_list_view, name='category_list'),
     path('product/<slug:product_slug>/', views.product_detail_view, name='product_detail'),
     path('search/', views.search_view, name='search'),
+    path('search/suggest/', views.search_suggest_view, name='search_suggest'),
 
-    path('support/', TemplateView.as_view(template_name='support.html'), name='support'),
-    path('custom/', TemplateView.as_view(template_name='custom.html'), name='custom'),
+    path('support/', anonymous_page_cache()(TemplateView.as_view(template_name='support.html')), name='support'),
+    path('custom/', anonymous_page_cache()(TemplateView.as_view(template_name='custom.html')), name='custom'),
 
     path('register/', views.register_view, name='register'),
     path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
@@ -21,6 +23,9 @@ urlpatterns = [
     path('profile/', views.profile_view, name='profile'),
 
     path('admin-panel/', views.admin_panel_view, name='admin_panel'),
+    path('admin-panel/cache-stats/', views.admin_cache_stats, name='admin_cache_stats'),
+    path('admin-panel/export/<str:kind>/', views.admin_export, name='admin_export'),
+    path('admin-panel/stock-sync/', views.admin_stock_sync, name='admin_stock_sync'),
 
     # Users
     path('admin-panel/users/', views.admin_user_list, name='admin_user_list'),
@@ -44,8 +49,11 @@ urlpatterns = [
     path('admin-panel/products/<int:product_id>/delete/', views.admin_product_delete, name='admin_product_delete'),
 
     # Variants
+    path('admin-panel/variants/', views.admin_variant_list, name='admin_variant_list'),
+    path('admin-panel/variants/create/', views.admin_variant_create, name='admin_variant_create'),
     path('admin-panel/variants/<int:variant_id>/view/', views.admin_variant_view, name='admin_variant_view'),
     path('admin-panel/variants/<int:variant_id>/edit/', views.admin_variant_edit, name='admin_variant_edit'),
+    path('admin-panel/variants/<int:variant_id>/delete/', views.admin_variant_delete, name='admin_variant_delete'),
 
     # Orders
     path('admin-panel/orders/', views.admin_order_list, name='admin_order_list'),
@@ -56,6 +64,7 @@ urlpatterns = [
 
     # Cart
     path('cart/', views.cart_detail_view, name='cart_detail'),
+    path('cart/api/', views.cart_api_view, name='cart_api'),
     path('cart/add/<int:variant_id>/', views.add_to_cart_view, name='add_to_cart'),
     path('cart/remove/<int:item_id>/', views.remove_from_cart_view, name='remove_from_cart'),
     path('cart/remove-one/<int:item_id>/', views.remove_one_from_cart_view, name='remove_one_from_cart'),
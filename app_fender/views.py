@@ -1,34 +1,55 @@
+import base64
+import json
+import uuid
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import login
+from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Q
 from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.contrib import messages
-
-from .models import Product, ProductVariant, Category, Cart, CartItem, CustomUser, Order, OrderItem
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+
+from .models import Product, ProductVariant, Category, Cart, CustomUser, Order, OrderItem
+from .catalog import card_page, product_cards, variant_payload
+from .caching import anonymous_page_cache, page_cache_stats, product_version
+from .pagination import keyset_page
+from .facets import index as facet_index, selected_facets
+from .summaries import cart_summary, order_summary, session_summary
+from .checkout import OutOfStock, idempotency_key, place_order, previous_order
+from .reservations import HOLD_TTL, reserve
+from .carts import (add_item, decrement_item, decrement_variant, remove_item, remove_variant, session_cart_add,
+                    session_cart_decrement, session_cart_lines, session_cart_remove,
+                    session_cart_set, set_item_quantity)
+from .search import ranked, search_products
+from . import exports, fuzzy, prefix, stats, stock_sync
 from .forms import (CustomUserCreationForm, ShippingAddressForm, CustomUserEditForm,
                    CategoryForm, ProductForm, ProductVariantForm, OrderForm, ProductVariantFormSet)
 
+PRODUCTS_PER_PAGE = 24
+ADMIN_PER_PAGE = 50
+CART_API_MAX_OPS = 50
+
 def _get_cart(request):
-    if request.user.is_authenticated:
-        cart, created = Cart.objects.get_or_create(user=request.user)
-    else:
-        if not request.session.session_key:
-            request.session.create()
-        session_key = request.session.session_key
-        cart, created = Cart.objects.get_or_create(
-            session_key=session_key,
-            user__isnull=True
-        )
+    # Solo para usuarios autenticados; el carrito anónimo vive en la sesión (carts.py)
+    cart, created = Cart.objects.get_or_create(user=request.user)
     return cart
 
+@anonymous_page_cache()
 def home_view(request):
-    featured_products = Product.objects.all()[:5]
+    featured_products = product_cards()[:5]
     context = {
         'products': featured_products
     }
     return render(request, 'index.html', context)
 
+@anonymous_page_cache()
 def product_list_view(request):
     query = request.GET.get('query')
     category_slug = request.GET.get('category')
@@ -36,16 +57,31 @@ def product_list_view(request):
     selected_category = None
 
     if query:
-        products = products.filter(
-            Q(name__icontains=query) | Q(description__icontains=query) | Q(category__name__icontains=query)
-        ).distinct()
+        products = search_products(product_cards(products), query)
 
     if category_slug:
         selected_category = get_object_or_404(Category, slug=category_slug)
         products = products.filter(category=selected_category)
 
+    facets = None
+    matched = None
+    if not query and not category_slug:
+        product_ids, facets = facet_index.search(selected_facets(request.GET))
+        if product_ids is not None:
+            matched = set(product_ids)
+
+    page = None
+    if not query:
+        # Los resultados de búsqueda ya vienen acotados y ordenados por relevancia
+        page = keyset_page(
+            products.only('name'), ['name', 'id'], request.GET.get('cursor'), PRODUCTS_PER_PAGE, only=matched
+        )
+        products = page = card_page(page)
+
     context = {
         'products': products,
+        'page': page,
+        'facets': facets,
         'selected_category': selected_category,
         'query': query,
     }
@@ -57,50 +93,74 @@ def product_list_view(request):
 
     return render(request, template_name, context)
 
+@anonymous_page_cache()
 def category_list_view(request):
     categories = Category.objects.all()
     context = {'categories': categories}
     return render(request, 'categoria.html', context)
 
+@anonymous_page_cache()
 def product_detail_view(request, product_slug):
-    product = get_object_or_404(Product, slug=product_slug)
-    all_variants = ProductVariant.objects.filter(product=product).order_by('color')
+    # Producto y variantes en una sola consulta; solo se vuelve a consultar
+    # Product si no tiene variantes (o no existe)
+    all_variants = list(
+        ProductVariant.objects.select_related('product')
+        .filter(product__slug=product_slug)
+        .order_by('color')
+    )
 
-    if not all_variants.exists():
+    if not all_variants:
+        product = get_object_or_404(Product, slug=product_slug)
         return render(request, 'buy.html', {'product': product, 'variants': []})
 
+    product = all_variants[0].product
     selected_variant_id = request.GET.get('variant_id')
-
-    if selected_variant_id:
-        try:
-            main_variant = all_variants.get(id=selected_variant_id)
-        except ProductVariant.DoesNotExist:
-            main_variant = all_variants.first()
-    else:
-        main_variant = all_variants.first()
+    main_variant = all_variants[0]
+    for variant in all_variants:
+        if str(variant.id) == selected_variant_id:
+            main_variant = variant
+            break
 
     context = {
         'product': product,
+        'product_version': product_version(product.pk),
         'main_variant': main_variant,
-        'all_variants': all_variants
+        'all_variants': all_variants,
+        'variants_payload': variant_payload(all_variants),
     }
     return render(request, 'buy.html', context)
 
 def search_view(request):
     query = request.GET.get('search')
     products = Product.objects.none()
+    suggestions = []
 
     if query:
-        products = Product.objects.filter(
-            Q(name__icontains=query) | Q(description__icontains=query)
-        ).distinct()
+        products = search_products(product_cards(), query)
+        if not products or request.GET.get('fuzzy'):
+            suggestions = fuzzy.suggest(query)
+            products = ranked(product_cards(), [s['product_id'] for s in suggestions])
 
     context = {
         'query': query,
-        'products': products
+        'products': products,
+        'suggestions': suggestions,
     }
     return render(request, 'shop.html', context)
 
+@cache_control(public=True, max_age=300)
+def search_suggest_view(request):
+    query = request.GET.get('q', '')
+    results = []
+    for item in prefix.index.lookup(query):
+        if item['type'] == 'color':
+            url = f"{reverse('app_fender:search')}?{urlencode({'search': item['text']})}"
+        else:
+            url = reverse('app_fender:product_detail', args=[item['slug']])
+        results.append({'text': item['text'], 'type': item['type'], 'url': url})
+
+    return JsonResponse({'query': query, 'results': results})
+
 def register_view(request):
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
@@ -133,26 +193,84 @@ def is_staff_or_superuser(user):
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_panel_view(request):
-    total_users = CustomUser.objects.count()
-    total_categories = Category.objects.count()
-    total_products = Product.objects.count()
-    total_variants = ProductVariant.objects.count()
-    total_orders = Order.objects.count()
+    # Contadores mantenidos por señales (stats.py) en lugar de COUNT(*)
+    dashboard = stats.dashboard()
+    totals = dashboard['totals']
 
     context = {
-        'total_users': total_users,
-        'total_categories': total_categories,
-        'total_products': total_products,
-        'total_variants': total_variants,
-        'total_orders': total_orders,
+        'total_users': totals['users'],
+        'total_categories': totals['categories'],
+        'total_products': totals['products'],
+        'total_variants': totals['variants'],
+        'total_orders': totals['orders'],
+        'revenue_by_status': dashboard['revenue_by_status'],
+        'orders_today': dashboard['today'],
+        'orders_week': dashboard['week'],
     }
     return render(request, 'admin_panel.html', context)
 
+@login_required
+@user_passes_test(is_staff_or_superuser)
+def admin_cache_stats(request):
+    return JsonResponse({'page_cache': page_cache_stats()})
+
+@login_required
+@user_passes_test(is_staff_or_superuser)
+def admin_export(request, kind):
+    output_format = request.GET.get('format', 'csv')
+    if kind not in exports.EXPORTS or output_format not in exports.FORMATS:
+        raise Http404('Unknown export.')
+    try:
+        filters = exports.parse_filters(request.GET)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    content_type = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(exports.stream(kind, filters, output_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{output_format}"'
+    return response
+
+def _basic_auth_user(request):
+    # Authorization: Basic base64(usuario:contraseña)
+    scheme, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if scheme.lower() != 'basic' or not credentials:
+        return None
+    try:
+        username, _, password = base64.b64decode(credentials.strip()).decode('utf-8').partition(':')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return authenticate(request, username=username, password=password)
+
+@csrf_exempt
+def admin_stock_sync(request):
+    # Para sistemas de almacén: HTTP Basic con una cuenta staff, sin sesión ni CSRF
+    # POST {"records": [{"model_number": "...", "stock": 3, "price": "999.99"}, ...]}
+    user = _basic_auth_user(request)
+    if user is None:
+        response = JsonResponse({'error': 'Authentication required.'}, status=401)
+        response['WWW-Authenticate'] = 'Basic realm="stock-sync", charset="UTF-8"'
+        return response
+    if not is_staff_or_superuser(user):
+        return JsonResponse({'error': 'Staff account required.'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed.'}, status=405)
+    try:
+        records = json.loads(request.body).get('records')
+    except (ValueError, AttributeError):
+        records = None
+    if not isinstance(records, list) or not records or len(records) > stock_sync.MAX_RECORDS:
+        return JsonResponse(
+            {'error': f'Send between 1 and {stock_sync.MAX_RECORDS} records in "records".'}, status=400
+        )
+
+    results = stock_sync.apply_updates(records)
+    return JsonResponse({'results': results, 'totals': stock_sync.summarize(results)})
+
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_user_list(request):
-    users = CustomUser.objects.all().order_by('-date_joined')
-    context = {'users': users}
+    page = keyset_page(CustomUser.objects.all(), ['-date_joined', '-id'], request.GET.get('cursor'), ADMIN_PER_PAGE)
+    context = {'users': page, 'page': page}
     return render(request, 'admin/user_list.html', context)
 
 @login_required
@@ -210,7 +328,7 @@ def admin_user_delete(request, user_id):
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_category_list(request):
-    categories = Category.objects.all().order_by('name')
+    categories = Category.objects.annotate(product_count=Count('products')).order_by('name')
     context = {'categories': categories}
     return render(request, 'admin/category_list.html', context)
 
@@ -233,7 +351,9 @@ def admin_category_create(request):
 @user_passes_test(is_staff_or_superuser)
 def admin_category_view(request, category_id):
     category = get_object_or_404(Category, id=category_id)
-    context = {'category': category}
+    # Una consulta para todos los productos con sus conteos y rangos de precio
+    products = list(product_cards(category.products.all()).order_by('name'))
+    context = {'category': category, 'products': products}
     return render(request, 'admin/category_view.html', context)
 
 @login_required
@@ -298,8 +418,9 @@ def admin_product_create(request):
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_product_view(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
-    context = {'product': product}
+    product = get_object_or_404(Product.objects.select_related('category'), id=product_id)
+    variants = list(product.variants.order_by('id'))
+    context = {'product': product, 'variants': variants}
     return render(request, 'admin/product_view.html', context)
 
 @login_required
@@ -332,7 +453,7 @@ def admin_product_edit(request, product_id):
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_product_list(request):
-    products = Product.objects.select_related('category').all()
+    products = Product.objects.all()
 
     category_id = request.GET.get('category')
     selected_category = None
@@ -344,9 +465,10 @@ def admin_product_list(request):
         except Category.DoesNotExist:
             pass
 
-    products = products.order_by('name')
+    page = card_page(keyset_page(products.only('name'), ['name', 'id'], request.GET.get('cursor'), ADMIN_PER_PAGE))
     context = {
-        'products': products,
+        'products': page,
+        'page': page,
         'selected_category': selected_category
     }
     return render(request, 'admin/product_list.html', context)
@@ -368,8 +490,9 @@ def admin_product_delete(request, product_id):
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_variant_list(request):
-    variants = ProductVariant.objects.select_related('product').all().order_by('product__name', 'color')
-    context = {'variants': variants}
+    variants = ProductVariant.objects.select_related('product')
+    page = keyset_page(variants, ['product__name', 'color', 'id'], request.GET.get('cursor'), ADMIN_PER_PAGE)
+    context = {'variants': page, 'page': page}
     return render(request, 'admin/variant_list.html', context)
 
 @login_required
@@ -390,7 +513,7 @@ def admin_variant_create(request):
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_variant_view(request, variant_id):
-    variant = get_object_or_404(ProductVariant, id=variant_id)
+    variant = get_object_or_404(ProductVariant.objects.select_related('product__category'), id=variant_id)
     context = {'variant': variant}
     return render(request, 'admin/variant_view.html', context)
 
@@ -424,34 +547,16 @@ def admin_variant_delete(request, variant_id):
     context = {'variant': variant}
     return render(request, 'admin/variant_confirm_delete.html', context)
 
-@login_required
-@user_passes_test(is_staff_or_superuser)
-def admin_order_list(request):
-    orders = Order.objects.select_related('user').all().order_by('-created_at')
-    context = {'orders': orders}
-    return render(request, 'admin/order_list.html', context)
-
-@login_required
-@user_passes_test(is_staff_or_superuser)
-def admin_order_detail(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
-    order_items = order.items.select_related('product_variant__product').all()
-
-    context = {
-        'order': order,
-        'order_items': order_items
-    }
-    return render(request, 'admin/order_detail.html', context)
-
 def cart_detail_view(request):
-    cart = _get_cart(request)
-    cart_items = CartItem.objects.filter(cart=cart)
-
-    total_price = sum(item.get_total_item_price() for item in cart_items)
+    if request.user.is_authenticated:
+        summary = cart_summary(_get_cart(request))
+    else:
+        summary = session_summary(session_cart_lines(request))
 
     context = {
-        'cart_items': cart_items,
-        'total_price': total_price
+        'cart_items': summary,
+        'item_count': summary.item_count,
+        'total_price': summary.total_price
     }
     return render(request, 'cart.html', context)
 
@@ -463,82 +568,180 @@ def add_to_cart_view(request, variant_id):
         except ValueError:
             quantity = 1
 
-    variant = get_object_or_404(ProductVariant, id=variant_id)
-
     if quantity < 1:
+        variant = get_object_or_404(ProductVariant.objects.select_related('product'), id=variant_id)
         return redirect('app_fender:product_detail', product_slug=variant.product.slug)
 
-    cart = _get_cart(request)
-
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        product_variant=variant,
-        defaults={'quantity': quantity}
-    )
+    if request.user.is_authenticated:
+        added = add_item(_get_cart(request), variant_id, quantity)
+    else:
+        added = session_cart_add(request, variant_id, quantity)
 
-    if not created:
-        cart_item.quantity += quantity
-        cart_item.save()
+    if not added:
+        get_object_or_404(ProductVariant, id=variant_id)
+        messages.error(request, 'Sorry, there is not enough stock for that quantity.')
 
     return redirect('app_fender:cart_detail')
 
 def remove_from_cart_view(request, item_id):
-    cart = _get_cart(request)
-    item = get_object_or_404(CartItem, id=item_id, cart=cart)
-    item.delete()
+    if not request.user.is_authenticated:
+        if not session_cart_remove(request, item_id):
+            raise Http404
+        return redirect('app_fender:cart_detail')
+
+    if not remove_item(_get_cart(request), item_id):
+        raise Http404
     return redirect('app_fender:cart_detail')
 
 def remove_one_from_cart_view(request, item_id):
-    cart = _get_cart(request)
-    item = get_object_or_404(CartItem, id=item_id, cart=cart)
+    if not request.user.is_authenticated:
+        if not session_cart_decrement(request, item_id):
+            raise Http404
+        return redirect('app_fender:cart_detail')
+
+    if not decrement_item(_get_cart(request), item_id):
+        raise Http404
+    return redirect('app_fender:cart_detail')
+
+def _cart_line_json(line):
+    variant = line.product_variant
+    return {
+        'item_id': line.id,
+        'variant_id': variant.id,
+        'product': variant.product.name,
+        'color': variant.color,
+        'quantity': line.quantity,
+        'price': str(variant.price),
+        'line_total': str(line.line_total),
+        'image': variant.image.url if variant.image else '',
+    }
 
-    if item.quantity > 1:
-        item.quantity -= 1
-        item.save()
+def _cart_totals_json(summary):
+    return {'item_count': summary.item_count, 'total_price': str(summary.total_price)}
+
+def _apply_cart_op(request, cart, op):
+    try:
+        kind = op['op']
+        variant_id = int(op['variant_id'])
+        quantity = int(op.get('quantity', 1))
+    except (KeyError, TypeError, ValueError):
+        return 'Invalid operation.'
+
+    if kind == 'add':
+        if quantity < 1:
+            return 'Quantity must be at least 1.'
+        if cart:
+            done = add_item(cart, variant_id, quantity)
+        else:
+            done = session_cart_add(request, variant_id, quantity)
+    elif kind == 'set':
+        if cart:
+            done = set_item_quantity(cart, variant_id, quantity)
+        else:
+            done = session_cart_set(request, variant_id, quantity)
+        # Poner a 0 una línea inexistente no es un error
+        done = done or quantity < 1
+    elif kind == 'decrement':
+        # Resta en el servidor: dos clics seguidos restan dos aunque la página
+        # aún muestre la cantidad anterior
+        if cart:
+            done = decrement_variant(cart, variant_id)
+        else:
+            done = session_cart_decrement(request, variant_id)
+        if not done:
+            return 'That item is not in the cart.'
+    elif kind == 'remove':
+        if cart:
+            remove_variant(cart, variant_id)
+        else:
+            session_cart_remove(request, variant_id)
+        done = True
     else:
-        item.delete()
+        return f'Unknown operation "{kind}".'
+
+    return None if done else 'Not enough stock for that quantity.'
+
+@ensure_csrf_cookie
+def cart_api_view(request):
+    # GET devuelve el carrito completo; POST aplica un lote de operaciones
+    # {"ops": [{"op": "add"|"set"|"decrement"|"remove", "variant_id": 1, "quantity": 2}]}
+    # y devuelve solo las líneas afectadas y los nuevos totales.
+    cart = _get_cart(request) if request.user.is_authenticated else None
+
+    if request.method == 'GET':
+        summary = cart_summary(cart) if cart else session_summary(session_cart_lines(request))
+        return JsonResponse({
+            'lines': [_cart_line_json(line) for line in summary],
+            'totals': _cart_totals_json(summary),
+        })
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed.'}, status=405)
+
+    try:
+        ops = json.loads(request.body).get('ops')
+    except (ValueError, AttributeError):
+        ops = None
+    if not isinstance(ops, list) or not ops or len(ops) > CART_API_MAX_OPS:
+        return JsonResponse({'error': f'Send between 1 and {CART_API_MAX_OPS} operations in "ops".'}, status=400)
+
+    results = []
+    with transaction.atomic():
+        for op in ops:
+            if not isinstance(op, dict):
+                op = {}
+            error = _apply_cart_op(request, cart, op)
+            results.append({'variant_id': op.get('variant_id'), 'ok': error is None, 'error': error})
+
+    summary = cart_summary(cart) if cart else session_summary(session_cart_lines(request))
+    lines = {line.product_variant.id: line for line in summary}
+    for result in results:
+        try:
+            line = lines.get(int(result['variant_id']))
+        except (TypeError, ValueError):
+            line = None
+        result['line'] = _cart_line_json(line) if line else None
 
-    return redirect('app_fender:cart_detail')
+    return JsonResponse({'results': results, 'totals': _cart_totals_json(summary)})
+
+def _mark_shortages(cart_items, short_lines):
+    available = {line.pk: line.available for line in short_lines}
+    for item in cart_items:
+        item.available = available.get(item.pk)
 
 @login_required
 def checkout_view(request):
+    key = idempotency_key(request) if request.method == 'POST' else None
+    # Un reenvío del formulario ya procesado vuelve a la confirmación original
+    previous = previous_order(request.user, key)
+    if previous is not None:
+        return redirect('app_fender:order_confirmation', order_id=previous.id)
+
     cart = _get_cart(request)
-    cart_items = CartItem.objects.filter(cart=cart)
+    cart_items = cart_summary(cart)
 
-    if not cart_items.exists():
+    if not cart_items:
         return redirect('app_fender:cart_detail')
 
-    total_price = sum(item.get_total_item_price() for item in cart_items)
+    total_price = cart_items.total_price
+    reserved_until = None
 
     if request.method == 'POST':
         form = ShippingAddressForm(request.POST)
 
         if form.is_valid():
+            order = form.save(commit=False)
+            order.user = request.user
+            order.is_paid = True
             try:
-                with transaction.atomic():
-                    order = form.save(commit=False)
-                    order.user = request.user
-                    order.total_amount = total_price
-                    order.is_paid = True
-                    order.save()
-
-                    for item in cart_items:
-                        OrderItem.objects.create(
-                            order=order,
-                            product_variant=item.product_variant,
-                            quantity=item.quantity,
-                            price=item.product_variant.price
-                        )
-
-                        item.product_variant.stock -= item.quantity
-                        item.product_variant.save()
-
-                    cart_items.delete()
-
-                    return redirect('app_fender:order_confirmation', order_id=order.id)
-
-            except Exception as e:
-                print(f"Error during checkout: {e}")
+                order = place_order(cart, order, key)
+                return redirect('app_fender:order_confirmation', order_id=order.id)
+            except OutOfStock as error:
+                # Se vuelve a leer el carrito: otro comprador pudo cambiar el stock
+                cart_items = cart_summary(cart)
+                total_price = cart_items.total_price
+                _mark_shortages(cart_items, error.lines)
+                messages.error(request, 'Some items in your cart are no longer available in that quantity.')
 
     else:
         initial_data = {
@@ -546,10 +749,21 @@ def checkout_view(request):
         }
         form = ShippingAddressForm(initial=initial_data)
 
+        # Al entrar al checkout se retiene el stock del carrito durante HOLD_TTL
+        short_lines = reserve(cart)
+        if short_lines:
+            _mark_shortages(cart_items, short_lines)
+            messages.error(request, 'Some items in your cart are no longer available in that quantity.')
+        else:
+            reserved_until = timezone.now() + HOLD_TTL
+
     context = {
         'form': form,
         'cart_items': cart_items,
-        'total_price': total_price
+        'total_price': total_price,
+        'reserved_until': reserved_until,
+        # Se conserva entre reintentos del mismo formulario
+        'idempotency_key': key or uuid.uuid4().hex,
     }
 
     return render(request, 'checkout.html', context)
@@ -557,7 +771,7 @@ def checkout_view(request):
 @login_required
 def order_confirmation_view(request, order_id):
     order = get_object_or_404(Order, id=order_id, user=request.user)
-    order_items = order.items.all()
+    order_items = order_summary(order)
 
     context = {
         'order': order,
@@ -621,14 +835,20 @@ def admin_order_delete(request, order_id):
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_order_list(request):
-    orders = Order.objects.all().order_by('-created_at')
-    context = {'orders': orders}
+    # Subconsulta correlacionada: sin GROUP BY sobre todos los pedidos, la
+    # página sale del índice (created_at, id)
+    item_count = (
+        OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(total=Sum('quantity')).values('total')
+    )
+    orders = Order.objects.select_related('user').annotate(item_count=Coalesce(Subquery(item_count), 0))
+    page = keyset_page(orders, ['-created_at', '-id'], request.GET.get('cursor'), ADMIN_PER_PAGE)
+    context = {'orders': page, 'page': page}
     return render(request, 'admin/order_list.html', context)
 
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def admin_order_detail(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
-    order_items = OrderItem.objects.filter(order=order)
+    order = get_object_or_404(Order.objects.select_related('user'), id=order_id)
+    order_items = order_summary(order)
     context = {'order': order, 'order_items': order_items}
     return render(request, 'admin/order_detail.html', context)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +49,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'app_fender.personalization.PersonalizationMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -77,9 +80,34 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Las transacciones toman el bloqueo de escritura al empezar y esperan
+        # su turno en vez de fallar con "database is locked" (checkout concurrente)
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Cache compartida por todos los workers: las versiones de producto y de
+# catálogo, las páginas y sus bloqueos deben ser los mismos en cada proceso
+# (LocMemCache es por proceso y no sirve aquí). Va en Redis y no en SQLite para
+# no sumar lecturas y escrituras a la base del checkout; requiere el paquete
+# `redis`. Los tests corren en un solo proceso y usan LocMemCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+        'TIMEOUT': 60 * 60 * 24,
+    }
+}
+
+if sys.argv[1:2] == ['test']:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'TIMEOUT': 60 * 60 * 24,
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,6 +152,11 @@ LOGIN_REDIRECT_URL = 'app_fender:profile'
 # 3. A dónde ir DESPUÉS de un logout exitoso (tu página de inicio)
 LOGOUT_REDIRECT_URL = 'app_fender:home'
 
+# Correos (confirmaciones de pedido desde la cola de tareas); en desarrollo se
+# muestran en la consola del worker
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'orders@fender.local'
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
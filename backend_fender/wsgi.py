@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_fender.settings')
 
 application = get_wsgi_application()
+
+# Precarga los índices en memoria (autocompletado y facetas) al arrancar el worker
+from app_fender.facets import index as facet_index  # noqa: E402
+from app_fender.prefix import index as suggest_index  # noqa: E402
+
+suggest_index.warm()
+facet_index.warm()